@@ -0,0 +1,320 @@
+import re
+import sqlite3
+from fractions import Fraction
+from pathlib import Path
+from typing import NamedTuple
+
+class SearchResult(NamedTuple):
+    library: str # project file name
+    library_path: str
+    project_path: str # project_path of the timeline or clip the marker belongs to
+    item_name: str
+    marker_name: str
+    marker_type: str
+    start: int # ticks in the library's timebase
+    timebase: int
+    frame_rate: tuple
+    non_drop_frame: bool
+
+    @property
+    def start_seconds(self):
+        return Fraction(self.start, self.timebase)
+
+class MarkerDatabase:
+    """Stores ProjectFile contents in a SQLite database so markers from many libraries can be queried together"""
+
+    BATCH_SIZE = 10000
+
+    TABLES = (
+        """CREATE TABLE IF NOT EXISTS project_files (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            file_path TEXT NOT NULL UNIQUE,
+            timebase INTEGER NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS timelines (
+            id INTEGER PRIMARY KEY,
+            project_file_id INTEGER NOT NULL,
+            name TEXT,
+            project_path TEXT,
+            rate_numerator INTEGER,
+            rate_denominator INTEGER,
+            non_drop_frame INTEGER,
+            interlaced INTEGER
+        )""",
+        """CREATE TABLE IF NOT EXISTS clips (
+            id INTEGER PRIMARY KEY,
+            project_file_id INTEGER NOT NULL,
+            timeline_id INTEGER,
+            name TEXT,
+            clip_type TEXT,
+            project_path TEXT,
+            resource_id TEXT,
+            rate_numerator INTEGER,
+            rate_denominator INTEGER,
+            start_ticks INTEGER,
+            duration_ticks INTEGER,
+            offset_ticks INTEGER
+        )""",
+        """CREATE TABLE IF NOT EXISTS markers (
+            id INTEGER PRIMARY KEY,
+            project_file_id INTEGER NOT NULL,
+            timeline_id INTEGER,
+            clip_id INTEGER,
+            name TEXT,
+            marker_type TEXT,
+            start_ticks INTEGER,
+            duration_ticks INTEGER,
+            rate_numerator INTEGER,
+            rate_denominator INTEGER,
+            completed INTEGER,
+            non_drop_frame INTEGER
+        )""",
+        # inverted index over marker names and metadata, one row per distinct token in each searchable marker
+        # rows are written in marker_id order, which keeps inserts into the primary key cheap
+        """CREATE TABLE IF NOT EXISTS marker_tokens (
+            token TEXT NOT NULL,
+            marker_id INTEGER NOT NULL,
+            project_file_id INTEGER NOT NULL,
+            PRIMARY KEY (marker_id, token)
+        ) WITHOUT ROWID"""
+    )
+
+    # created after rows are loaded, building an index once is much cheaper than updating it on every insert
+    INDEXES = (
+        "CREATE INDEX IF NOT EXISTS timelines_project_file ON timelines (project_file_id)",
+        "CREATE INDEX IF NOT EXISTS clips_project_file ON clips (project_file_id)",
+        "CREATE INDEX IF NOT EXISTS clips_timeline ON clips (timeline_id)",
+        "CREATE INDEX IF NOT EXISTS clips_resource ON clips (resource_id)",
+        "CREATE INDEX IF NOT EXISTS markers_project_file ON markers (project_file_id)",
+        "CREATE INDEX IF NOT EXISTS markers_timeline_start ON markers (timeline_id, start_ticks)",
+        "CREATE INDEX IF NOT EXISTS markers_clip ON markers (clip_id)",
+        "CREATE INDEX IF NOT EXISTS markers_type ON markers (marker_type, completed)",
+        "CREATE INDEX IF NOT EXISTS marker_tokens_token ON marker_tokens (token)",
+        "CREATE INDEX IF NOT EXISTS marker_tokens_project_file ON marker_tokens (project_file_id)"
+    )
+
+    INSERTS = {
+        'timelines': "INSERT INTO timelines VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        'clips': "INSERT INTO clips VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        'markers': "INSERT INTO markers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        'marker_tokens': "INSERT INTO marker_tokens VALUES (?, ?, ?)"
+    }
+
+    ID_TABLES = ('timelines', 'clips', 'markers')
+
+    TOKEN_PATTERN = re.compile(r'\w+')
+
+    # SQLite stores INTEGER values as signed 64-bit integers
+    INTEGER_RANGE = range(-2 ** 63, 2 ** 63)
+
+    SEARCH_QUERY = """
+        SELECT project_files.name, project_files.file_path, COALESCE(timelines.project_path, clips.project_path),
+               COALESCE(timelines.name, clips.name), markers.name, markers.marker_type, markers.start_ticks,
+               project_files.timebase, markers.rate_numerator, markers.rate_denominator, markers.non_drop_frame
+        FROM markers
+        JOIN project_files ON project_files.id = markers.project_file_id
+        LEFT JOIN timelines ON timelines.id = markers.timeline_id
+        LEFT JOIN clips ON clips.id = markers.clip_id
+        WHERE markers.id IN (
+            SELECT DISTINCT first_term.marker_id FROM marker_tokens AS first_term
+            WHERE {first_condition} {other_conditions}
+            LIMIT ?
+        )
+        ORDER BY project_files.name, 3, 4, markers.start_ticks
+    """
+
+    # how many postings are counted when comparing terms, enough to tell rare terms from common ones
+    TERM_ESTIMATE_LIMIT = 10000
+
+    def __init__(self, database_path):
+        self.database_path = Path(database_path)
+        # isolation_level=None so transactions are controlled explicitly with BEGIN/COMMIT
+        self.connection = sqlite3.connect(self.database_path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        for table in self.TABLES:
+            self.connection.execute(table)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def import_project_files(self, project_files):
+        # returns the number of rows written to each table, re-importing a file_path replaces its previous rows
+        cursor = self.connection.cursor()
+
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # ids are assigned here rather than by SQLite so child rows can reference them without a round trip per row
+            self._next_ids = {table: self._get_max_id(cursor, table) + 1 for table in self.ID_TABLES}
+            self._pending_rows = {table: [] for table in self.INSERTS}
+            self._row_counts = dict.fromkeys(self.INSERTS, 0)
+
+            for project_file in project_files:
+                self._import_project_file(cursor, project_file)
+
+            self._flush(cursor)
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+        for index in self.INDEXES:
+            cursor.execute(index)
+        cursor.execute("ANALYZE")
+
+        return self._row_counts
+
+    def _import_project_file(self, cursor, project_file):
+        timebase = project_file.timebase
+        if timebase not in self.INTEGER_RANGE:
+            raise ValueError(f"'{project_file.name}' has a timebase of {timebase} ticks per second, too large to store in SQLite")
+        cursor.execute(
+            "INSERT INTO project_files (name, file_path, timebase) VALUES (?, ?, ?) "
+            "ON CONFLICT (file_path) DO UPDATE SET name = excluded.name, timebase = excluded.timebase",
+            (project_file.name, str(project_file.file_path), timebase)
+        )
+        project_file_id = cursor.execute("SELECT id FROM project_files WHERE file_path = ?", (str(project_file.file_path),)).fetchone()[0]
+
+        for table in self.INSERTS:
+            cursor.execute(f"DELETE FROM {table} WHERE project_file_id = ?", (project_file_id,))
+
+        for item in project_file.get_timelines():
+            timeline_id = self._add_timeline(cursor, project_file_id, item)
+            for clip in item.clips:
+                self._add_clip(cursor, project_file_id, clip, timebase, timeline_id)
+            for marker in item.markers:
+                self._add_marker(cursor, project_file_id, marker, timebase, timeline_id=timeline_id, searchable=True)
+
+        for item in project_file.get_clips():
+            self._add_clip(cursor, project_file_id, item, timebase)
+
+    def _add_timeline(self, cursor, project_file_id, timeline):
+        timeline_id = self._get_next_id('timelines')
+        frame_rate = timeline.timecode_info.frame_rate
+        self._queue_row(cursor, 'timelines', (
+            timeline_id, project_file_id, timeline.name, str(timeline.project_path),
+            frame_rate[0], frame_rate[1], timeline.timecode_info.non_drop_frame, timeline.interlaced
+        ))
+        return timeline_id
+
+    def _add_clip(self, cursor, project_file_id, clip, timebase, timeline_id=None):
+        clip_id = self._get_next_id('clips')
+        timecode_info = clip.timecode_info
+        frame_rate = self._get_frame_rate(timecode_info)
+        self._queue_row(cursor, 'clips', (
+            clip_id, project_file_id, timeline_id, clip.name, clip.clip_type, str(clip.project_path), getattr(clip, 'resource_id', None),
+            frame_rate[0], frame_rate[1], *self._get_ticks(timecode_info, timebase, clip.name)
+        ))
+        # markers on clips inside a timeline are already searchable as the timeline's own markers
+        for marker in clip.markers:
+            self._add_marker(cursor, project_file_id, marker, timebase, clip_id=clip_id, searchable=timeline_id is None)
+
+    def _add_marker(self, cursor, project_file_id, marker, timebase, timeline_id=None, clip_id=None, searchable=False):
+        marker_id = self._get_next_id('markers')
+        timecode_info = marker.timecode_info
+        frame_rate = self._get_frame_rate(timecode_info)
+        self._queue_row(cursor, 'markers', (
+            marker_id, project_file_id, timeline_id, clip_id, marker.name, marker.marker_type,
+            *self._get_ticks(timecode_info, timebase, marker.name)[:2],
+            frame_rate[0], frame_rate[1], marker.completed, timecode_info.non_drop_frame
+        ))
+
+        if searchable:
+            for token in set(self.tokenize(self._get_searchable_text(marker))):
+                self._queue_row(cursor, 'marker_tokens', (token, marker_id, project_file_id))
+
+    def _queue_row(self, cursor, table, row):
+        pending_rows = self._pending_rows[table]
+        pending_rows.append(row)
+        if len(pending_rows) >= self.BATCH_SIZE:
+            self._flush(cursor)
+
+    def _flush(self, cursor):
+        # timelines are written first so every batch of clips and markers can reference them
+        for table, rows in self._pending_rows.items():
+            if rows:
+                cursor.executemany(self.INSERTS[table], rows)
+                self._row_counts[table] += len(rows)
+                rows.clear()
+
+    def _get_next_id(self, table):
+        next_id = self._next_ids[table]
+        self._next_ids[table] += 1
+        return next_id
+
+    def _get_max_id(self, cursor, table):
+        return cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+    def search(self, query, prefix=True, limit=100):
+        # returns SearchResults for markers containing every word in query, matched case-insensitively,
+        # with prefix=True the last word also matches longer words that start with it, ex: "music cue 1" finds "Music Cue 12"
+        terms = self.tokenize(query)
+        if not terms:
+            return []
+
+        term_conditions = []
+        for term_index, term in enumerate(terms):
+            if prefix and term_index == len(terms) - 1:
+                # every token starting with term sorts between term and its successor, so this is a range scan over the token index
+                term_conditions.append(("{table}.token >= ? AND {table}.token < ?", (term, term[:-1] + chr(ord(term[-1]) + 1))))
+            else:
+                term_conditions.append(("{table}.token = ?", (term,)))
+
+        # postings for the rarest term are scanned and the other terms are checked per marker with primary key lookups,
+        # so the scan can stop as soon as limit markers match instead of building every term's full list of markers
+        term_conditions.sort(key=self._estimate_postings)
+        (first_condition, parameters), *other_term_conditions = term_conditions
+        other_conditions = ""
+        for condition, condition_parameters in other_term_conditions:
+            other_conditions += (" AND EXISTS (SELECT 1 FROM marker_tokens AS other_term WHERE other_term.marker_id = first_term.marker_id "
+                                 f"AND {condition.format(table='other_term')})")
+            parameters += condition_parameters
+
+        search_query = self.SEARCH_QUERY.format(first_condition=first_condition.format(table='first_term'), other_conditions=other_conditions)
+        rows = self.connection.execute(search_query, (*parameters, -1 if limit is None else limit))
+        return [SearchResult(*row[:8], (row[8], row[9]), bool(row[10])) for row in rows]
+
+    def _estimate_postings(self, term_condition):
+        condition, parameters = term_condition
+        return self.connection.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM marker_tokens WHERE {condition.format(table='marker_tokens')} LIMIT ?)",
+            (*parameters, self.TERM_ESTIMATE_LIMIT)
+        ).fetchone()[0]
+
+    @classmethod
+    def tokenize(cls, text):
+        return cls.TOKEN_PATTERN.findall(text.casefold())
+
+    def _get_searchable_text(self, marker):
+        # metadata can be a description string or a dict of values, both are searched along with the name
+        text = [marker.name or '']
+        metadata = getattr(marker, 'metadata', None)
+        if isinstance(metadata, dict):
+            text.extend(str(value) for value in metadata.values())
+        elif metadata is not None:
+            text.append(str(metadata))
+        return ' '.join(text)
+
+    def _get_frame_rate(self, timecode_info):
+        return timecode_info.conformed_frame_rate if timecode_info.conform_rate_check else timecode_info.frame_rate
+
+    def _get_ticks(self, timecode_info, timebase, name):
+        # returns start, duration, and offset in the project file's timebase
+        # parsers already share that timebase, this only rescales TimecodeInfo objects that were created with their own.
+        # ValueError is raised if a time doesn't fit in an INTEGER column, import_project_files then rolls back the whole import
+        times = (timecode_info.start, timecode_info.duration, timecode_info.offset)
+        if timecode_info.timebase != timebase:
+            times = tuple(time * timebase // timecode_info.timebase for time in times)
+
+        for time in times:
+            if time not in self.INTEGER_RANGE:
+                raise ValueError(f"'{name}' has a time of {float(Fraction(time, timebase)):.0f}s, which is too large to store in SQLite "
+                                 f"with a timebase of {timebase} ticks per second")
+        return times
@@ -1,5 +1,14 @@
+import fnmatch
+import math
+import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
+from timecode import Timecode
+from fcpx_marker_tool.common.database import MarkerDatabase
 
 class InputHandler:
 
@@ -45,6 +54,7 @@ class InputHandler:
             raise FileNotFoundError
 
 class OutputFormatting:
+    """Formats a single item, using the same formatters MarkerRenderer uses for whole marker lists"""
 
     def __init__(self, item, formatting_option=None):
         self.item = item
@@ -61,21 +71,21 @@ class OutputFormatting:
             # There must be at least three timestamps listed in ascending order.
             # The minimum length for video chapters is 10 seconds.
             # https://support.google.com/youtube/answer/9884579
-        timecode = self.item.timecode_info.start.as_hr_min_sec(self.frame_rate, self.item.timecode_info.non_drop_frame)
-        return f"{timecode} {self.item.name}"
+        return self._render("Youtube")
         
     def dvd_studio_pro(self):
         # need to check for first chapter starting at 00:00:00:00 here
-        timecode = self.item.timecode_info.start.as_timecode(self.frame_rate, self.item.timecode_info.non_drop_frame)
-        return f"{timecode} {self.item.name}"
+        return self._render("DVD Studio Pro")
 
     def name_frames(self):
-        frame_number = self.item.timecode_info.start.as_frame(self.frame_rate)
-        return f"{self.item.name} - {frame_number}"
+        return self._render("Marker Name - Frames")
 
     def name_fractional_timecode(self):
-        fractional_timecode = self.item.timecode_info.start.as_fractional_timecode(self.frame_rate, self.item.timecode_info.non_drop_frame)
-        return f"{self.item.name} - {fractional_timecode}"
+        return self._render("Marker Name - Fractional Timecode")
+
+    def _render(self, formatting_option):
+        (line,), = MarkerRenderer([formatting_option]).iter_lines([self.item])
+        return line
 
     FORMATTING_OPTIONS = {
     "Youtube": youtube,
@@ -90,6 +100,157 @@ class OutputFormatting:
         except KeyError:
             print("Invalid format option")
 
+    @classmethod
+    def format_marker_list(cls, marker_list, formatting_option):
+        return MarkerRenderer([formatting_option]).render(marker_list)[formatting_option]
+
+class DecomposedTime(NamedTuple):
+    frame: int
+    hrs: int
+    mins: int
+    secs: int
+    frs: int
+    timecode_obj: Timecode # standard Timecode object for the marker's frame rate, used for its string formatting rules
+    fractional_timecode_obj: Timecode # the same with set_fractional(True), used for its fractional string layout
+    frames_per_second: int # whole frames in one second of timecode, ex: 30 for 29.97
+
+class MarkerRenderer:
+    """Renders any number of OutputFormatting.FORMATTING_OPTIONS for a marker list in a single pass"""
+
+    def __init__(self, formatting_options):
+        for formatting_option in formatting_options:
+            if formatting_option not in self.RENDER_OPTIONS:
+                raise ValueError(f"Invalid format option '{formatting_option}'")
+        self.formatting_options = list(formatting_options)
+        # Timecode objects are only used for their conversion methods, so one set per frame rate and NDF/DF setting is enough
+        self._timecode_objs = {}
+
+    def render(self, marker_list, streams=None):
+        # returns {formatting_option: [formatted strings]} sorted by marker start,
+        # if streams is given as {formatting_option: file object} each line is printed to its stream instead
+        rendered = {formatting_option: [] for formatting_option in self.formatting_options}
+        outputs = [rendered[formatting_option] if streams is None else streams[formatting_option] for formatting_option in self.formatting_options]
+
+        for lines in self.iter_lines(self.sort_markers(marker_list)):
+            for line, output in zip(lines, outputs):
+                if streams is None:
+                    output.append(line)
+                else:
+                    print(line, file=output)
+
+        return rendered
+
+    @staticmethod
+    def sort_markers(marker_list):
+        # markers from one parser share a timebase so their ticks can be compared directly,
+        # any others are compared after scaling every start to a timebase they all divide evenly into
+        marker_list = list(marker_list)
+        timebase = math.lcm(1, *{marker.timecode_info.timebase for marker in marker_list})
+        return sorted(marker_list, key=lambda marker: marker.timecode_info.start * (timebase // marker.timecode_info.timebase))
+
+    def iter_lines(self, markers):
+        # lazily yields a tuple of formatted strings per marker, one for each formatting option, in the order markers are given
+        formatters = [self.RENDER_OPTIONS[formatting_option] for formatting_option in self.formatting_options]
+        for marker in markers:
+            decomposed_time = self._decompose(marker.timecode_info)
+            yield tuple(formatter(self, marker.name, decomposed_time) for formatter in formatters)
+
+    def youtube(self, name, decomposed_time):
+        hr, min, sec = (str(value).zfill(2) for value in (decomposed_time.hrs, decomposed_time.mins, decomposed_time.secs))
+        return f"{hr + ':' if hr != '00' else ''}{min}:{sec} {name}"
+
+    def dvd_studio_pro(self, name, decomposed_time):
+        timecode = decomposed_time.timecode_obj.tc_to_string(*decomposed_time[1:5])
+        return f"{timecode} {name}"
+
+    def name_frames(self, name, decomposed_time):
+        return f"{name} - {decomposed_time.frame}"
+
+    def name_fractional_timecode(self, name, decomposed_time):
+        # set_fractional(True) makes Timecode round the frames to thousandths of a second, done here from the frames already decomposed
+        subframe = round(decomposed_time.frs / decomposed_time.frames_per_second, 3)
+        fractional_timecode = decomposed_time.fractional_timecode_obj.tc_to_string(decomposed_time.hrs, decomposed_time.mins, decomposed_time.secs, subframe)
+        return f"{name} - {fractional_timecode}"
+
+    RENDER_OPTIONS = {
+    "Youtube": youtube,
+    "DVD Studio Pro": dvd_studio_pro,
+    "Marker Name - Frames": name_frames,
+    "Marker Name - Fractional Timecode": name_fractional_timecode
+    }
+
+    def _decompose(self, timecode_info):
+        frame_rate = timecode_info.conformed_frame_rate if timecode_info.conform_rate_check else timecode_info.frame_rate
+        timecode_obj, fractional_timecode_obj, frames_per_second = self._get_timecode_objs(frame_rate, timecode_info.non_drop_frame)
+        frame = timecode_info.as_frame(timecode_info.start, frame_rate)
+        return DecomposedTime(frame, *timecode_obj.frames_to_tc(frame + 1), timecode_obj, fractional_timecode_obj, frames_per_second)
+
+    def _get_timecode_objs(self, frame_rate, non_drop_frame):
+        # returns (Timecode, fractional Timecode, frames per second), the frame count of one second of timecode is read through
+        # Timecode's public parsing so it always matches how that version of the module counts frames
+        key = (frame_rate, non_drop_frame)
+        if key not in self._timecode_objs:
+            timecode_obj = Timecode(frame_rate, force_non_drop_frame=non_drop_frame)
+            fractional_timecode_obj = Timecode(frame_rate, force_non_drop_frame=non_drop_frame)
+            fractional_timecode_obj.set_fractional(True)
+            one_second = timecode_obj.tc_to_string(0, 0, 1, 0)
+            frames_per_second = Timecode(frame_rate, one_second, force_non_drop_frame=non_drop_frame).frames - 1
+            self._timecode_objs[key] = (timecode_obj, fractional_timecode_obj, frames_per_second)
+        return self._timecode_objs[key]
+
+class BackgroundRenderer:
+    """Renders every formatting option for a list of items on a background thread, so output is ready by the time an item is chosen"""
+
+    def __init__(self, items, formatting_options=None):
+        self.formatting_options = list(formatting_options if formatting_options is not None else OutputFormatting.FORMATTING_OPTIONS)
+        self._selected_item = None
+        self._stop_event = threading.Event() # set once an item is selected, or everything is cancelled
+        # one worker renders items in the order given, so the most likely items are ready first
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._futures = {item: self._executor.submit(self._render, item) for item in items}
+
+    def select(self, item):
+        # cancels work for every other item and frees anything already rendered for them
+        self._selected_item = item
+        self._stop_event.set()
+        for other_item, future in self._futures.items():
+            if other_item is not item:
+                future.cancel()
+        self._futures = {item: self._futures[item]} if item in self._futures else {}
+
+    def get(self, item, formatting_option):
+        # returns the sorted, formatted marker list, waiting for the background thread if it's still rendering this item
+        self.select(item)
+        future = self._futures.get(item)
+
+        # if the item hasn't been started yet, rendering just the one option here is faster than rendering all of them
+        rendered = None if future is None or future.cancel() else future.result()
+        if rendered is None:
+            return OutputFormatting.format_marker_list(item.markers, formatting_option)
+        return rendered[formatting_option]
+
+    def cancel(self):
+        self._selected_item = None
+        self._stop_event.set()
+        for future in self._futures.values():
+            future.cancel()
+        self._futures = {}
+        self._executor.shutdown(wait=False)
+
+    def _render(self, item):
+        # returns None if rendering was stopped because another item was selected
+        marker_renderer = MarkerRenderer(self.formatting_options)
+        rendered = {formatting_option: [] for formatting_option in self.formatting_options}
+        outputs = [rendered[formatting_option] for formatting_option in self.formatting_options]
+
+        for lines in marker_renderer.iter_lines(marker_renderer.sort_markers(item.markers)):
+            if self._stop_event.is_set() and item is not self._selected_item:
+                return None
+            for line, output in zip(lines, outputs):
+                output.append(line)
+
+        return rendered
+
 class OutputFile:
 
     def __init__(self, item_list, file_format, output_file_path=sys.stdout):
@@ -112,11 +273,20 @@ class OutputFile:
         self.output_file_path = open(self.output_file_path, "w", encoding="UTF-8")
         self._save_file()
 
+    def sqlite_database(self):
+        # item_list must contain ProjectFile objects for this format, markers are appended to an existing database
+        self.output_file_path = self.output_file_path.with_suffix('.sqlite')
+        with MarkerDatabase(self.output_file_path) as marker_database:
+            self.row_counts = marker_database.import_project_files(self.item_list)
+
     FILE_FORMAT_OPTIONS = {
     "Print": print_to_stdout,
-    "Text file": text_file
+    "Text file": text_file,
+    "SQLite database": sqlite_database
     }
 
+    PROJECT_FILE_FORMAT_OPTIONS = {"SQLite database"}
+
     @property
     def file_format(self):
         return self._file_format
@@ -128,19 +298,119 @@ class OutputFile:
         except KeyError:
             print("Invalid format option")
 
+class ExportSummary(NamedTuple):
+    files: int
+    markers: int
+    skipped: int # timelines without any markers, no file is written for these
+    elapsed: float
+
+    @property
+    def files_per_second(self):
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def markers_per_second(self):
+        return self.markers / self.elapsed if self.elapsed else 0.0
+
+class TimelineExport:
+    """Writes one marker list per timeline, mirroring each timeline's project_path as directories inside output_directory"""
+
+    INVALID_CHARACTERS = re.compile(r'[\\/:*?"<>|]')
+
+    def __init__(self, project_file, formatting_option, output_directory, max_workers=4):
+        self.project_file = project_file
+        self.formatting_option = formatting_option
+        self.output_directory = Path(output_directory)
+        self.max_workers = max_workers
+        self.output_file_paths = self._get_output_file_paths(project_file.get_timelines())
+
+    def existing_files(self):
+        return [output_file_path for output_file_path in self.output_file_paths.values() if output_file_path.exists()]
+
+    def run(self):
+        files, markers, skipped = 0, 0, 0
+        start_time = time.perf_counter()
+        # formatting happens on this thread while writes run on the pool, the semaphore keeps at most a few pending files in memory
+        pending_writes = threading.BoundedSemaphore(self.max_workers * 2)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = []
+            for timeline, output_file_path in self.output_file_paths.items():
+                if len(timeline.markers) == 0:
+                    skipped += 1
+                    continue
+
+                formatted_marker_list = OutputFormatting.format_marker_list(timeline.markers, self.formatting_option)
+                output_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+                pending_writes.acquire()
+                future = executor.submit(OutputFile, formatted_marker_list, "Text file", output_file_path)
+                future.add_done_callback(lambda _: pending_writes.release())
+                futures.append(future)
+
+                files += 1
+                markers += len(formatted_marker_list)
+
+            for future in futures:
+                # re-raise any errors from the writer threads
+                future.result()
+
+        return ExportSummary(files, markers, skipped, time.perf_counter() - start_time)
+
+    def _get_output_file_paths(self, timelines):
+        # returns {timeline_obj: output_file_path}, duplicate names within the same folder get a numbered suffix in timeline order
+        output_file_paths = {}
+        used_paths = set()
+
+        for timeline in timelines:
+            folder = self.output_directory.joinpath(*[self._sanitize(part) for part in timeline.project_path.parts])
+            file_name = self._sanitize(timeline.name)
+            output_file_path = folder / f"{file_name}.txt"
+            copy_number = 1
+
+            # compare case-insensitively since macOS and Windows file systems usually are
+            while str(output_file_path).lower() in used_paths:
+                copy_number += 1
+                output_file_path = folder / f"{file_name} ({copy_number}).txt"
+
+            used_paths.add(str(output_file_path).lower())
+            output_file_paths[timeline] = output_file_path
+
+        return output_file_paths
+
+    def _sanitize(self, name):
+        sanitized_name = self.INVALID_CHARACTERS.sub('_', str(name)).strip()
+        return sanitized_name if sanitized_name not in {'', '.', '..'} else '_'
+
 class DirectoryTree:
 
     def __init__(self, item_list, file_path=False):
         self.item_list = item_list #must be a list containing item objects that all have a valid project_path or file_path
         self.nested_items = self._get_nested_items(file_path=file_path)
 
-    def print_tree(self):
-        item_list = []
-        self._recursive_parse_nested_items(self.nested_items, item_list)
-
+    def print_tree(self, **filters):
         print(".")
-        for item in item_list:
-            print(item)
+        for line in self.iter_tree(**filters):
+            print(line)
+
+    def iter_tree(self, item_type=None, name=None, folder=None, max_depth=None):
+        # lazily yields one rendered line at a time so large trees can be printed or paged without building every string first
+        # item_type is a class (or tuple of classes) to match, name and folder are case-insensitive globs matched against
+        # the item name and any of its parent folder names, folders deeper than max_depth are collapsed into a single summary line
+        predicate = self._create_filter_predicate(item_type, name, folder)
+        match_counts = {} if predicate is not None or max_depth is not None else None
+
+        yield from self._iter_nested_items(self.nested_items, predicate, match_counts, max_depth)
+
+    def iter_pages(self, page_size, **filters):
+        page = []
+        for line in self.iter_tree(**filters):
+            page.append(line)
+            if len(page) == page_size:
+                yield page
+                page = []
+        if page:
+            yield page
 
     def _get_nested_items(self, file_path=False):
         # returns a dictionary of items nested based on their project path, the key for each item object will be its index number in self.items
@@ -161,15 +431,64 @@ class DirectoryTree:
 
         return nested_items_dict
 
-    def _recursive_parse_nested_items(self, dictionary, item_list, level=0, prefix=""):
-        directory_count = len(dictionary)
+    def _create_filter_predicate(self, item_type, name, folder):
+        if item_type is None and name is None and folder is None:
+            return None
+
+        name_pattern = name.lower() if name is not None else None
+        folder_pattern = folder.lower() if folder is not None else None
 
-        for index, (key, value) in enumerate(dictionary.items()):
-            connector = "├──" if index != directory_count - 1 else "└──"
+        def predicate(item, parents):
+            if item_type is not None and not isinstance(item, item_type):
+                return False
+            if name_pattern is not None and not fnmatch.fnmatchcase(str(item.name).lower(), name_pattern):
+                return False
+            if folder_pattern is not None and not any(fnmatch.fnmatchcase(parent.lower(), folder_pattern) for parent in parents):
+                return False
+            return True
+
+        return predicate
+
+    def _count_matches(self, dictionary, predicate, match_counts, parents=()):
+        # counts matching items below a folder once per render, so empty folders can be skipped and collapsed folders summarised
+        count = 0
+        for key, value in dictionary.items():
+            if isinstance(value, dict):
+                count += self._count_matches(value, predicate, match_counts, (*parents, key))
+            elif predicate is None or predicate(value, parents):
+                count += 1
+        match_counts[id(dictionary)] = count
+        return count
+
+    def _visible_children(self, dictionary, predicate, match_counts, parents):
+        for key, value in dictionary.items():
+            if isinstance(value, dict):
+                if match_counts is None:
+                    yield key, value
+                    continue
+                if id(value) not in match_counts:
+                    self._count_matches(value, predicate, match_counts, (*parents, key))
+                if match_counts[id(value)]:
+                    yield key, value
+            elif predicate is None or predicate(value, parents):
+                yield key, value
+
+    def _iter_nested_items(self, dictionary, predicate, match_counts, max_depth, level=0, prefix="", parents=()):
+        children = self._visible_children(dictionary, predicate, match_counts, parents)
+        next_child = next(children, None)
+
+        while next_child is not None:
+            key, value = next_child
+            next_child = next(children, None)
+            is_last = next_child is None
+            connector = "└──" if is_last else "├──"
 
             if isinstance(value, dict):
-                prefix = "│" if index != directory_count - 1 else " "
-                item_list.append(f"{'   ' * level}{connector} {key}")
-                self._recursive_parse_nested_items(value, item_list, level+1, prefix)
+                if max_depth is not None and level >= max_depth:
+                    yield f"{prefix}{connector} {key} ({match_counts[id(value)]} items)"
+                else:
+                    yield f"{prefix}{connector} {key}"
+                    child_prefix = prefix + ("    " if is_last else "│   ")
+                    yield from self._iter_nested_items(value, predicate, match_counts, max_depth, level+1, child_prefix, (*parents, key))
             else:
-                item_list.append(f"{'   ' * int(level/2)}{prefix}{'   ' * int(level/2)}{connector} [{key+1}] {value.name}")
\ No newline at end of file
+                yield f"{prefix}{connector} [{key+1}] {value.name}"
@@ -0,0 +1,57 @@
+import copy
+import heapq
+import math
+from fractions import Fraction
+from typing import NamedTuple
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+
+class MarkerSource(NamedTuple):
+    item: object # Timeline or Clip object whose markers are merged
+    offset: Fraction = Fraction(0) # seconds added to every marker start, can be an int, Fraction, or rational tuple, and can be negative
+
+def merge_markers(sources):
+    """Returns an iterator that lazily yields the markers of every source in start order, shifted by each source's offset.
+
+    Each source is sorted on its own and the sources are combined with a k-way heap merge, so only one shifted marker per
+    source is held at a time and the combined list is never built. Markers are shallow copies whose TimecodeInfo uses a timebase
+    shared by every source, markers with the same start keep the order of their sources.
+    """
+    sources = [MarkerSource(*source) for source in sources]
+    offsets = [_to_fraction(source.offset) for source in sources]
+    for source, offset in zip(sources, offsets):
+        if offset < 0 and any(marker.timecode_info.as_fraction(marker.timecode_info.start) + offset < 0 for marker in source.item.markers):
+            raise ValueError(f"offset of {offset}s would move markers from '{source.item.name}' before zero")
+
+    timebase = math.lcm(*_get_timebases(sources), *(offset.denominator for offset in offsets))
+    streams = [_shift_markers(source.item.markers, offset, timebase) for source, offset in zip(sources, offsets)]
+
+    return heapq.merge(*streams, key=lambda marker: marker.timecode_info.start)
+
+def _get_timebases(sources):
+    timebases = {1}
+    for source in sources:
+        timebases.add(source.item.timecode_info.timebase)
+        timebases.update(marker.timecode_info.timebase for marker in source.item.markers)
+    return timebases
+
+def _shift_markers(markers, offset, timebase):
+    offset_ticks = offset.numerator * timebase // offset.denominator
+
+    # markers are sorted by their start in the shared timebase, since their own timebases can differ
+    for marker in sorted(markers, key=lambda marker: marker.timecode_info.start * (timebase // marker.timecode_info.timebase)):
+        timecode_info = marker.timecode_info
+        scale = timebase // timecode_info.timebase
+
+        shifted_marker = copy.copy(marker)
+        shifted_marker.timecode_info = TimecodeInfo(
+            timecode_info.frame_rate, timecode_info.start * scale + offset_ticks, timecode_info.duration * scale, timecode_info.offset * scale,
+            timecode_info.non_drop_frame, timecode_info.conformed_frame_rate, timebase
+        )
+        yield shifted_marker
+
+def _to_fraction(time_value):
+    if isinstance(time_value, tuple):
+        return Fraction(*time_value)
+    elif isinstance(time_value, (int, Fraction)):
+        return Fraction(time_value)
+    raise ValueError("offsets must be set as an integer, rational tuple, or rational fraction of seconds")
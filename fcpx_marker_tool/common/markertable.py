@@ -0,0 +1,280 @@
+import array
+import bisect
+import fnmatch
+import math
+from pathlib import Path
+from fcpx_marker_tool.common.projectclasses import Marker
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+from fcpx_marker_tool.parsers.parsefilter import ParseFilter
+
+try:
+    import numpy
+except ImportError:
+    # numpy is optional, install with 'pip install fcpx-marker-tool[numpy]' for vectorised operations and .npy/.npz files
+    numpy = None
+
+class MarkerTable:
+    """Struct-of-arrays copy of a list of markers, with one typed column per attribute instead of one object per marker.
+
+    Columns are array.array objects, or numpy arrays once a table has been loaded or transformed with numpy installed.
+    Both support the buffer protocol, so columns can be handed to numpy or anything else that reads buffers without copying.
+    """
+
+    # column name: array typecode, numpy understands the same codes
+    COLUMNS = {
+        'start': 'q', # ticks in the table's timebase
+        'duration': 'q',
+        'rate_index': 'H', # index into rates
+        'marker_type': 'b', # index into MARKER_TYPES
+        'completed': 'b', # -1 for markers that aren't to-dos, otherwise 0 or 1
+        'name_offsets': 'q' # marker i's UTF-8 name is names[name_offsets[i]:name_offsets[i + 1]], so this has one extra entry
+    }
+    MARKER_TYPES = ParseFilter.MARKER_TYPES
+    COMPLETED_CODES = {None: -1, False: 0, True: 1}
+
+    def __init__(self, columns, names, rates, timebase):
+        self.columns = columns # {column name: array.array or numpy array}
+        self.names = names # every marker name encoded as UTF-8 and joined into one bytes-like buffer
+        self.rates = rates # list of (frame_rate, conformed_frame_rate, non_drop_frame) tuples, frame rates are rational tuples
+        self.timebase = timebase
+
+    @classmethod
+    def from_markers(cls, markers):
+        # markers without a name are stored with an empty name. ValueError is raised if the markers' times don't fit in the 'q' columns
+        # once they're in the table's timebase, which is the lcm of the markers' own and is stored as int64 too
+        markers = list(markers)
+        timebase = math.lcm(1, *{marker.timecode_info.timebase for marker in markers})
+        if timebase >= 2 ** 63:
+            raise ValueError(f"The markers' timebases need a shared timebase of {timebase} ticks per second, too large for a MarkerTable")
+        columns = {column: array.array(typecode) for column, typecode in cls.COLUMNS.items()}
+        names = bytearray()
+        rate_indexes = {}
+        marker_type_codes = {marker_type: code for code, marker_type in enumerate(cls.MARKER_TYPES)}
+
+        columns['name_offsets'].append(0)
+        for marker in markers:
+            timecode_info = marker.timecode_info
+            scale = timebase // timecode_info.timebase
+            rate = (timecode_info.frame_rate, timecode_info.conformed_frame_rate, timecode_info.non_drop_frame)
+
+            try:
+                columns['marker_type'].append(marker_type_codes[marker.marker_type])
+            except KeyError:
+                raise ValueError(f"MarkerTable can't store markers of type '{marker.marker_type}'")
+            try:
+                columns['start'].append(timecode_info.start * scale)
+                columns['duration'].append(timecode_info.duration * scale)
+            except OverflowError:
+                raise ValueError(f"Marker '{marker.name}' is too far from zero to store in a MarkerTable with a timebase of {timebase} "
+                                 "ticks per second") from None
+            columns['rate_index'].append(rate_indexes.setdefault(rate, len(rate_indexes)))
+            columns['completed'].append(cls.COMPLETED_CODES[marker.completed])
+
+            names += (marker.name or '').encode('utf-8')
+            columns['name_offsets'].append(len(names))
+
+        return cls(columns, bytes(names), list(rate_indexes), timebase)
+
+    @classmethod
+    def from_items(cls, items):
+        # items can be any mix of Timeline and Clip objects, their markers are stored in the order given
+        return cls.from_markers(marker for item in items for marker in item.markers)
+
+    def __len__(self):
+        return len(self.columns['start'])
+
+    def __getitem__(self, index):
+        # an int returns a Marker object, a slice returns a new MarkerTable, which is a view of this one when columns are numpy arrays
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return self.take(range(start, stop, step))
+            return self._slice_rows(start, stop)
+        return self.marker(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.marker(index)
+
+    def name(self, index):
+        name_offsets = self.columns['name_offsets']
+        return bytes(self.names[name_offsets[index]:name_offsets[index + 1]]).decode('utf-8')
+
+    def marker(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("MarkerTable index out of range")
+
+        frame_rate, conformed_frame_rate, non_drop_frame = self.rates[self.columns['rate_index'][index]]
+        timecode_info = TimecodeInfo(frame_rate, int(self.columns['start'][index]), int(self.columns['duration'][index]),
+                                     non_drop_frame=non_drop_frame, conformed_frame_rate=conformed_frame_rate, timebase=self.timebase)
+        completed_code = self.columns['completed'][index]
+        completed = None if completed_code < 0 else bool(completed_code)
+
+        return Marker(self.name(index), self.MARKER_TYPES[self.columns['marker_type'][index]], timecode_info, completed)
+
+    def column_buffers(self):
+        # returns {column name: memoryview} without copying, plus 'names' for the name buffer
+        buffers = {column: memoryview(values) for column, values in self.columns.items()}
+        buffers['names'] = memoryview(self.names)
+        return buffers
+
+    def to_numpy(self):
+        # returns {column name: numpy array} sharing memory with this table, plus 'names' as a uint8 array
+        numpy_module = self._require_numpy()
+        arrays = {column: numpy_module.frombuffer(values, dtype=self.COLUMNS[column]) for column, values in self.columns.items()}
+        arrays['names'] = numpy_module.frombuffer(self.names, dtype='uint8')
+        return arrays
+
+    def take(self, indices):
+        # returns a new MarkerTable containing the rows at indices, in that order
+        if numpy is not None:
+            return self._take_numpy(numpy.asarray(indices, dtype='int64'))
+
+        indices = list(indices)
+        columns = {column: array.array(typecode, [self.columns[column][index] for index in indices])
+                   for column, typecode in self.COLUMNS.items() if column != 'name_offsets'}
+
+        name_offsets = self.columns['name_offsets']
+        names = b''.join([self.names[name_offsets[index]:name_offsets[index + 1]] for index in indices])
+        columns['name_offsets'] = array.array('q', [0])
+        columns['name_offsets'].extend(self._running_total(name_offsets[index + 1] - name_offsets[index] for index in indices))
+
+        return MarkerTable(columns, names, self.rates, self.timebase)
+
+    def argsort(self, by='start'):
+        # stable, so markers with the same value keep their current order
+        if by == 'name':
+            return sorted(range(len(self)), key=self.name)
+        values = self.columns[by]
+        if numpy is not None:
+            return numpy.argsort(numpy.asarray(values), kind='stable')
+        return sorted(range(len(self)), key=values.__getitem__)
+
+    def sort(self, by='start'):
+        # by is 'name' or the name of any column
+        return self.take(self.argsort(by))
+
+    def filter(self, marker_types=None, completed=None, start=None, end=None, name=None):
+        # same meaning as ParseFilter for marker_types and completed, start and end are ticks and name is a case-insensitive glob
+        return self.take(self.matching_indices(marker_types, completed, start, end, name))
+
+    def matching_indices(self, marker_types=None, completed=None, start=None, end=None, name=None):
+        type_codes = None if marker_types is None else [self.MARKER_TYPES.index(marker_type) for marker_type in marker_types]
+        to_do_code = self.MARKER_TYPES.index('to-do')
+
+        if numpy is not None:
+            columns = {column: numpy.asarray(values) for column, values in self.columns.items()}
+            mask = numpy.ones(len(self), dtype=bool)
+            if type_codes is not None:
+                mask &= numpy.isin(columns['marker_type'], type_codes)
+            if completed is not None:
+                mask &= (columns['marker_type'] != to_do_code) | (columns['completed'] == int(completed))
+            if start is not None:
+                mask &= columns['start'] >= start
+            if end is not None:
+                mask &= columns['start'] < end
+            indices = numpy.flatnonzero(mask)
+        else:
+            columns = self.columns
+            indices = [
+                index for index in range(len(self))
+                if (type_codes is None or columns['marker_type'][index] in type_codes)
+                and (completed is None or columns['marker_type'][index] != to_do_code or columns['completed'][index] == int(completed))
+                and (start is None or columns['start'][index] >= start)
+                and (end is None or columns['start'][index] < end)
+            ]
+
+        if name is not None:
+            pattern = name.lower()
+            indices = [index for index in indices if fnmatch.fnmatchcase(self.name(index).lower(), pattern)]
+
+        return indices
+
+    def between(self, start, end):
+        # rows with start <= marker start < end from a table that is already sorted by start, found with a binary search
+        starts = self.columns['start']
+        return self._slice_rows(bisect.bisect_left(starts, start), bisect.bisect_left(starts, end))
+
+    def save(self, path):
+        # a .npz path saves a single archive, anything else is saved as a directory with one .npy file per column.
+        # Only the directory form can be memory-mapped by load(), numpy always reads .npz members into memory
+        numpy_module = self._require_numpy()
+        path = Path(path)
+        arrays = self.to_numpy()
+        arrays['rates'] = numpy_module.array([self._rate_row(rate) for rate in self.rates], dtype='int64').reshape(-1, 5)
+        arrays['timebase'] = numpy_module.array(self.timebase, dtype='int64')
+
+        if path.suffix == '.npz':
+            numpy_module.savez(path, **arrays)
+        else:
+            path.mkdir(parents=True, exist_ok=True)
+            for array_name, values in arrays.items():
+                numpy_module.save(path / f"{array_name}.npy", values)
+
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        # columns loaded from a directory are read-only memory maps when mmap is True, so only the rows used are read from disk
+        numpy_module = cls._require_numpy()
+        path = Path(path)
+
+        if path.suffix == '.npz':
+            with numpy_module.load(path) as archive:
+                arrays = {array_name: archive[array_name] for array_name in archive.files}
+        else:
+            mmap_mode = 'r' if mmap else None
+            array_names = (*cls.COLUMNS, 'names', 'rates', 'timebase')
+            arrays = {array_name: numpy_module.load(path / f"{array_name}.npy", mmap_mode=mmap_mode) for array_name in array_names}
+
+        columns = {column: arrays[column] for column in cls.COLUMNS}
+        rates = [cls._rate_from_row(row) for row in arrays['rates'].tolist()]
+
+        return cls(columns, arrays['names'], rates, int(arrays['timebase']))
+
+    def _slice_rows(self, start, stop):
+        # numpy arrays slice into views and array.array slices are copies, either way names can stay shared
+        columns = {column: values[start:stop] for column, values in self.columns.items() if column != 'name_offsets'}
+        columns['name_offsets'] = self.columns['name_offsets'][start:stop + 1]
+        return MarkerTable(columns, self.names, self.rates, self.timebase)
+
+    def _take_numpy(self, indices):
+        columns = {column: numpy.asarray(self.columns[column])[indices] for column in self.COLUMNS if column != 'name_offsets'}
+
+        # gathers every selected name into a new buffer at once, each output byte is copied from its name's old position
+        name_offsets = numpy.asarray(self.columns['name_offsets'])
+        name_starts = name_offsets[indices]
+        name_lengths = name_offsets[indices + 1] - name_starts
+        new_name_offsets = numpy.zeros(len(indices) + 1, dtype='int64')
+        numpy.cumsum(name_lengths, out=new_name_offsets[1:])
+        source_positions = numpy.arange(new_name_offsets[-1]) + numpy.repeat(name_starts - new_name_offsets[:-1], name_lengths)
+        columns['name_offsets'] = new_name_offsets
+
+        names = numpy.frombuffer(self.names, dtype='uint8')[source_positions]
+        return MarkerTable(columns, names, self.rates, self.timebase)
+
+    def _running_total(self, values):
+        total = 0
+        for value in values:
+            total += value
+            yield total
+
+    @staticmethod
+    def _rate_row(rate):
+        frame_rate, conformed_frame_rate, non_drop_frame = rate
+        conformed_frame_rate = conformed_frame_rate if conformed_frame_rate is not None else (0, 0)
+        return (*frame_rate, *conformed_frame_rate, int(non_drop_frame))
+
+    @staticmethod
+    def _rate_from_row(row):
+        frame_rate_numerator, frame_rate_denominator, conformed_numerator, conformed_denominator, non_drop_frame = row
+        conformed_frame_rate = (conformed_numerator, conformed_denominator) if conformed_denominator else None
+        return ((frame_rate_numerator, frame_rate_denominator), conformed_frame_rate, bool(non_drop_frame))
+
+    @staticmethod
+    def _require_numpy():
+        if numpy is None:
+            raise ImportError("numpy is required for this, install it with 'pip install fcpx-marker-tool[numpy]'")
+        return numpy
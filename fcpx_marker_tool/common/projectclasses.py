@@ -2,9 +2,10 @@ from pathlib import PurePath
 
 class ProjectFile:
 
-    def __init__(self, name, file_path, project_path=None):
+    def __init__(self, name, file_path, project_path=None, timebase=1):
         self.name = name
         self.file_path = file_path
+        self.timebase = timebase # ticks per second shared by every TimecodeInfo in the project, see TimecodeInfo for details
         # project_path is optional because it's assumed it will be the project name, should be the root for clip and timeline project paths
         if project_path is None:
             self.project_path = self.name
@@ -12,6 +13,11 @@ class ProjectFile:
             self.project_path = project_path
         self.resources = []
         self.items = [] # list of clip and/or timeline objects found in project
+        self.load_strategy = None # 'tree' or 'streaming', how the parser that created this read the document
+        self.peak_memory = None # peak traced bytes while loading and parsing, only measured when there's a memory budget
+        # reverse index of which clips use each resource, filled in as resources and items are added
+        self.resource_usage = {} # {resource_id: ResourceUsage}
+        self._resource_ids_by_file_path = {} # {file_path: [resource_id, ...]}
 
     @property
     def project_path(self):
@@ -24,14 +30,49 @@ class ProjectFile:
     def add_item(self, item):
         if isinstance(item, (Clip, Timeline)):
             self.items.append(item)
+            self._add_resource_usage(item)
         else:
             raise ValueError("ProjectFile items must be either Clip or Timeline objects")
 
     def add_resource(self, resource):
         if isinstance(resource, Resource):
             self.resources.append(resource)
+            self._resource_ids_by_file_path.setdefault(resource.file_path, []).append(resource.id)
         else:
             raise ValueError("Not a valid Resource object")
+
+    def get_resource_usage(self, resource_id):
+        # returns the ResourceUsage for resource_id, or None if no clip uses it
+        return self.resource_usage.get(resource_id)
+
+    def get_file_usage(self, file_path):
+        # returns a ResourceUsage for each resource with this file_path that is used by at least one clip
+        return [self.resource_usage[resource_id] for resource_id in self._resource_ids_by_file_path.get(file_path, [])
+                if resource_id in self.resource_usage]
+
+    def _add_resource_usage(self, item):
+        if isinstance(item, Clip):
+            self._get_resource_usage_entry(item).add_clip(item)
+            return
+
+        for clip in item.clips:
+            self._get_resource_usage_entry(clip).add_clip(clip, item)
+        # markers from the same clip are next to each other, so the entry is only looked up again when the clip changes
+        usage_entry, previous_clip = None, None
+        for marker in item.markers:
+            source_clip = getattr(marker, 'source_clip', None)
+            if source_clip is None:
+                continue
+            if source_clip is not previous_clip:
+                usage_entry, previous_clip = self._get_resource_usage_entry(source_clip), source_clip
+            usage_entry.timeline_markers.append((item, marker))
+
+    def _get_resource_usage_entry(self, clip):
+        # clips without a resource_id, like gaps and titles, are collected under None
+        resource_id = getattr(clip, 'resource_id', None)
+        if resource_id not in self.resource_usage:
+            self.resource_usage[resource_id] = ResourceUsage(resource_id)
+        return self.resource_usage[resource_id]
     
     def get_clips(self):
         return [item for item in self.items if isinstance(item, Clip)]
@@ -49,6 +90,24 @@ class Resource:
         self.timecode_info = timecode_info # TimecodeInfo class object
         self.interlaced = interlaced # boolean, True for progressive and False for interlaced
 
+class ResourceUsage:
+    """Clips that use one Resource, and the timeline markers that came from those clips"""
+
+    def __init__(self, resource_id):
+        self.resource_id = resource_id
+        self.clips = [] # browser clips and clips inside timelines, in document order
+        self.browser_clips = [] # only the clips that aren't inside a timeline
+        self.timelines = [] # timelines containing at least one of the clips, in document order
+        self.timeline_markers = [] # (timeline, marker) pairs, the clips' own markers are still found in clip.markers
+
+    def add_clip(self, clip, timeline=None):
+        self.clips.append(clip)
+        if timeline is None:
+            self.browser_clips.append(clip)
+        # a timeline's clips are all added together, so checking the last timeline is enough to keep each one listed once
+        if timeline is not None and (not self.timelines or self.timelines[-1] is not timeline):
+            self.timelines.append(timeline)
+
 class Timeline:
 
     def __init__(self, name, timecode_info, project_path, interlaced=False):
@@ -109,6 +168,7 @@ class Marker:
         # metadata is optional but can be used for things like descriptions.
         if metadata is not None:
             self.metadata = metadata
+        # timeline markers created from a clip's markers also have a source_clip attribute set to that Clip object
 
     @property
     def completed(self):
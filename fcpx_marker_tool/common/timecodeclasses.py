@@ -1,18 +1,22 @@
+import math
 from fractions import Fraction
-from typing import NamedTuple
 from timecode import Timecode
 
 class TimecodeInfo:
 
-    def __init__(self, frame_rate, start, duration, offset=0, non_drop_frame=True, conformed_frame_rate=None):
+    def __init__(self, frame_rate, start, duration, offset=0, non_drop_frame=True, conformed_frame_rate=None, timebase=None):
         self.frame_rate = frame_rate # can be rational string like '30000/1001', rational tuple (30000, 1001), int 30, or float 29.97
         # as notated in the Timecode module, frame_rate should be one of ['23.976', '23.98', '24', '25', '29.97', '30', '50', '59.94', '60', 'NUMERATOR/DENOMINATOR', ms'] where "ms" is equal to 1000 fps.
         self.conformed_frame_rate = conformed_frame_rate # Optional, but NLEs like FCPX will sometimes calculate frame number based on a conformed frame rate
+        # timebase is the number of integer ticks per second that start, duration, and offset are stored in.
+        # Parsers share one timebase across a whole project file so times can be compared as plain ints, if it isn't given
+        # the smallest timebase that exactly represents the frame rates and rational start, duration, and offset values is used.
+        self.timebase = timebase if timebase is not None else self._get_timebase(start, duration, offset)
         self.start = start # Start time for video/audio element
         self.duration = duration # Total length of time for video/audio element
         self.offset = offset # Start time within a timeline, default is 0 since not everything has an offset
         self.non_drop_frame = non_drop_frame # Boolean, True for NDF and False for DF
-        # start, duration, and offset can be set with an int (frames) or tuple (rational time).
+        # start, duration, and offset can be set with an int (ticks), tuple (rational time in seconds), or Fraction (seconds), and always return ticks.
 
     @property
     def frame_rate(self):
@@ -45,7 +49,7 @@ class TimecodeInfo:
 
     @start.setter
     def start(self, value):
-        self._start = RationalTime(*self._check_for_tuple(value))
+        self._start = self._to_ticks(value)
 
     @property
     def duration(self):
@@ -53,7 +57,7 @@ class TimecodeInfo:
 
     @duration.setter
     def duration(self, value):
-        self._duration = RationalTime(*self._check_for_tuple(value))
+        self._duration = self._to_ticks(value)
 
     @property
     def offset(self):
@@ -61,7 +65,7 @@ class TimecodeInfo:
 
     @offset.setter
     def offset(self, value):
-        self._offset = RationalTime(*self._check_for_tuple(value))
+        self._offset = self._to_ticks(value)
 
     @property
     def format(self):
@@ -74,48 +78,56 @@ class TimecodeInfo:
     def conform_rate_check(self):
         return False if self.conformed_frame_rate is None else True
 
-    def _check_for_tuple(self, time_value):
+    def as_fraction(self, ticks):
+        # returns ticks as a Fraction of seconds
+        return Fraction(ticks, self.timebase)
 
-        frame_rate = self.conformed_frame_rate if self.conform_rate_check else self.frame_rate
+    def as_frame(self, ticks, frame_rate):
+        return (ticks * frame_rate[0]) // (self.timebase * frame_rate[1])
 
-        if isinstance(time_value, int):
-            rational_value = (time_value * frame_rate[1], frame_rate[0])
-        elif isinstance(time_value, tuple):
-            rational_value = time_value
-        elif isinstance(time_value, Fraction):
-            rational_value = (time_value.numerator, time_value.denominator)
-        else:
-            raise ValueError("start, duration, and offset values must be set as an integer, rational tuple, rational fraction")
-
-        return rational_value
-
-class RationalTime(NamedTuple):
-    numerator: int
-    denominator: int
-
-    @property
-    def as_fraction(self):
-        return Fraction(*self)
-
-    def as_frame(self, frame_rate):
-        frame = int((self.numerator * frame_rate[0]) / (self.denominator * frame_rate[1]))
-        return frame
-
-    def as_timecode(self, frame_rate, non_drop_frame=True):
-        timecode_obj = self._create_timecode_obj(frame_rate, non_drop_frame)
+    def as_timecode(self, ticks, frame_rate, non_drop_frame=True):
+        timecode_obj = self._create_timecode_obj(ticks, frame_rate, non_drop_frame)
         # returns standard format timecode as string, copied from Timecode __repr__
         return timecode_obj.tc_to_string(*timecode_obj.frames_to_tc(timecode_obj.frames))
 
-    def as_fractional_timecode(self, frame_rate, non_drop_frame=True):
-        timecode_obj = self._create_timecode_obj(frame_rate, non_drop_frame)
+    def as_fractional_timecode(self, ticks, frame_rate, non_drop_frame=True):
+        timecode_obj = self._create_timecode_obj(ticks, frame_rate, non_drop_frame)
         timecode_obj.set_fractional(True)
         # returns fractional timecode as string, copied from Timecode __repr__
         return timecode_obj.tc_to_string(*timecode_obj.frames_to_tc(timecode_obj.frames))
 
-    def as_hr_min_sec(self, frame_rate, non_drop_frame=True):
-        timecode_obj = self._create_timecode_obj(frame_rate, non_drop_frame)
+    def as_hr_min_sec(self, ticks, frame_rate, non_drop_frame=True):
+        timecode_obj = self._create_timecode_obj(ticks, frame_rate, non_drop_frame)
         hr, min, sec = (lambda *args: [str(arg).zfill(2) for arg in args])(timecode_obj.hrs, timecode_obj.mins, timecode_obj.secs)
         return f"{hr + ':' if hr != '00' else ''}{min}:{sec}"
 
-    def _create_timecode_obj(self, frame_rate, non_drop_frame):
-        return Timecode(frame_rate, frames=self.as_frame(frame_rate) + 1, force_non_drop_frame=non_drop_frame)
\ No newline at end of file
+    def _create_timecode_obj(self, ticks, frame_rate, non_drop_frame):
+        return Timecode(frame_rate, frames=self.as_frame(ticks, frame_rate) + 1, force_non_drop_frame=non_drop_frame)
+
+    def _get_timebase(self, *time_values):
+        timebase = 1
+        for frame_rate in (self.frame_rate, self.conformed_frame_rate):
+            if isinstance(frame_rate, tuple):
+                timebase = math.lcm(timebase, Fraction(*frame_rate).numerator)
+        for time_value in time_values:
+            if isinstance(time_value, tuple):
+                timebase = math.lcm(timebase, Fraction(*time_value).denominator)
+            elif isinstance(time_value, Fraction):
+                timebase = math.lcm(timebase, time_value.denominator)
+        return timebase
+
+    def _to_ticks(self, time_value):
+        if isinstance(time_value, int):
+            return time_value
+        elif isinstance(time_value, tuple):
+            numerator, denominator = time_value
+        elif isinstance(time_value, Fraction):
+            numerator, denominator = time_value.numerator, time_value.denominator
+        else:
+            raise ValueError("start, duration, and offset values must be set as an integer, rational tuple, rational fraction")
+
+        ticks, remainder = divmod(numerator * self.timebase, denominator)
+        if remainder:
+            raise ValueError(f"{numerator}/{denominator}s can't be represented exactly with a timebase of {self.timebase}")
+
+        return ticks
@@ -1,42 +1,355 @@
+import contextlib
+import fnmatch
+import signal
+import time
+from fractions import Fraction
 from xml.etree.ElementTree import ParseError
+from timecode import Timecode
 from fcpx_marker_tool.parsers.xmlparser import XMLParser
-from fcpx_marker_tool.common import filemanagement
+from fcpx_marker_tool.parsers.parseprogress import ParseProgress, ParseCancelled
+from fcpx_marker_tool.common import filemanagement, markerstream
+from fcpx_marker_tool.common.database import MarkerDatabase
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+from fcpx_marker_tool.common.projectclasses import Timeline, Clip
 
 class MenuBasedCLI:
 
+    TREE_PAGE_SIZE = 50
+    TREE_FILTER_OPTIONS = ["Show all items", "Timelines only", "Clips only", "Filter by item name", "Filter by event name"]
+    PROGRESS_LINE_WIDTH = 100
+    BACKGROUND_RENDER_MARKER_LIMIT = 250000
+    SEARCH_RESULT_LIMIT = 100
+
+    def __init__(self, parse_filter=None, time_budget=None, memory_budget=None):
+        self.parse_filter = parse_filter
+        self.time_budget = time_budget # seconds
+        self.memory_budget = memory_budget # bytes
+        self._background_renderer = None
+
     def run_cli(self):
+        parsed_project_file = self._load_project_file()
+        if parsed_project_file is None:
+            return 1
+
+        # formatting for the items most likely to be exported starts now, and runs while the menus below are being read
+        self._background_renderer = filemanagement.BackgroundRenderer(self._get_likely_marker_sources(parsed_project_file))
+        try:
+            mode = self.MODE_OPTIONS[self._choose_mode(parsed_project_file)]
+            if mode is not MenuBasedCLI._export_single_item:
+                # only single item exports use the rendered output, stopping now keeps it from competing with the chosen mode
+                self._background_renderer.cancel()
+            mode(self, parsed_project_file)
+        finally:
+            self._background_renderer.cancel()
+
+        return 0
+
+    def _get_likely_marker_sources(self, project_file_obj):
+        # timelines first since they're exported most often, limited so unused output doesn't take up too much memory.
+        # Items that would go over the limit are skipped and later ones still added if they fit, an item over the limit
+        # by itself is never rendered in the background and is formatted when it's exported instead
+        marker_sources = []
+        marker_count = 0
+
+        for item in project_file_obj.get_timelines() + project_file_obj.get_clips():
+            if len(item.markers) == 0 or marker_count + len(item.markers) > self.BACKGROUND_RENDER_MARKER_LIMIT:
+                continue
+            marker_count += len(item.markers)
+            marker_sources.append(item)
+
+        return marker_sources
+
+    def _load_project_file(self):
+        # returns the parsed ProjectFile, or None if loading was cancelled before anything could be parsed
         while True:
             try:
                 file_path = self._file_input_template("Enter file path: ")
-                parser = XMLParser(file_path).create_parser()
+                load_progress = ParseProgress(self._print_progress, self.time_budget, self.memory_budget)
+                with self._cancel_on_interrupt(load_progress):
+                    parser = XMLParser(file_path, load_progress).create_parser(self.parse_filter)
                 break
             except (IsADirectoryError, ValueError, ParseError):
                 print("Error: not a valid xml file")
+            except ParseCancelled as error:
+                print(f"\n{error.reason} while loading the file, nothing was parsed.")
+                return None
+
+        # the time budget covers loading and parsing together, so parsing only gets what loading left of it
+        time_budget = max(self.time_budget - load_progress.elapsed, 0) if self.time_budget is not None else None
+        parse_progress = ParseProgress(self._print_progress, time_budget, self.memory_budget)
+        try:
+            with self._cancel_on_interrupt(parse_progress):
+                parsed_project_file = parser.parse_xml(progress=parse_progress)
+            print()
+        except ParseCancelled as error:
+            parsed_project_file = error.partial_result
+            print(f"\n{error.reason}, continuing with the {len(parsed_project_file.items)} items parsed so far.")
+
+        if parsed_project_file.peak_memory is not None:
+            load_description = "one event at a time" if parsed_project_file.load_strategy == 'streaming' else "whole file loaded"
+            print(f"Peak traced memory: {parsed_project_file.peak_memory / 1024 / 1024:.1f} MB ({load_description})")
+
+        return parsed_project_file
+
+    def run_search_cli(self, database_path):
+        if not database_path.is_file():
+            print("Error: database file not found")
+            return 1
+
+        with MarkerDatabase(database_path) as marker_database:
+            while True:
+                query = input("Enter words to search for in marker names, or 'exit' to quit: ")
+                if query == "exit":
+                    return 0
+
+                start_time = time.perf_counter()
+                search_results = marker_database.search(query, limit=self.SEARCH_RESULT_LIMIT)
+                elapsed = time.perf_counter() - start_time
+
+                for search_result in search_results:
+                    print(self._format_search_result(search_result))
+
+                limit_text = f", showing the first {self.SEARCH_RESULT_LIMIT}" if len(search_results) == self.SEARCH_RESULT_LIMIT else ""
+                print(f"{len(search_results)} markers found in {elapsed * 1000:.0f} ms{limit_text}")
+
+    def _format_search_result(self, search_result):
+        timecode_info = TimecodeInfo(search_result.frame_rate, search_result.start, 0, non_drop_frame=search_result.non_drop_frame,
+                                     timebase=search_result.timebase)
+        timecode = timecode_info.as_hr_min_sec(search_result.start, search_result.frame_rate, search_result.non_drop_frame)
+        return f"{timecode} {search_result.marker_name} ({search_result.library}: {search_result.project_path}/{search_result.item_name})"
+
+    @contextlib.contextmanager
+    def _cancel_on_interrupt(self, progress):
+        # Ctrl-C stops the parse cooperatively, so anything already parsed can still be used
+        previous_handler = signal.signal(signal.SIGINT, lambda signal_number, frame: progress.cancel("Parse cancelled"))
+        try:
+            yield
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+
+    def _print_progress(self, progress):
+        if progress.phase == 'loading':
+            status = f"Loading {progress.bytes_read / 1e6:.1f}/{progress.total_bytes / 1e6:.1f} MB"
+        else:
+            counts = progress.counts
+            status = f"Parsed {counts['events']} events, {counts['projects']} projects, {counts['clips']} clips, {counts['markers']} markers"
 
-        parsed_project_file = parser.parse_xml()
-        marker_source = self._multiple_source_check(parsed_project_file)
-        if len(marker_source.markers) != 0:
+        eta = progress.eta
+        eta_text = f", ETA {eta:.0f}s" if eta is not None and progress.fraction < 1 else ""
+        print(f"\r{status} ({progress.fraction:.0%}{eta_text})".ljust(self.PROGRESS_LINE_WIDTH), end="", flush=True)
+
+    def _export_single_item(self, project_file_obj):
+        marker_source = self._multiple_source_check(project_file_obj)
+        if marker_source is None:
+            return
+        elif len(marker_source.markers) != 0:
+            # stops background formatting of the other items, this one keeps going while the output format is chosen
+            self._background_renderer.select(marker_source)
             output_formatting = self._choose_output_formatting()
-            formatted_marker_list = self._format_marker_list(marker_source.markers, output_formatting)
+            formatted_marker_list = self._background_renderer.get(marker_source, output_formatting)
             self._format_and_save_file(formatted_marker_list)
         else:
             print("No markers found.")
 
-        return 0
+    def _export_all_timelines(self, project_file_obj):
+        output_formatting = self._choose_output_formatting()
+        output_directory = self._directory_input_template("Enter a directory path to save the Marker Lists: ")
+        timeline_export = filemanagement.TimelineExport(project_file_obj, output_formatting, output_directory)
+
+        if timeline_export.existing_files() and not self._rewrite_check(multiple_files=True):
+            return
+
+        summary = timeline_export.run()
+        print(f"Wrote {summary.markers} markers to {summary.files} files in {summary.elapsed:.2f}s "
+              f"({summary.markers_per_second:.0f} markers/s, {summary.files_per_second:.1f} files/s)")
+        if summary.skipped:
+            print(f"Skipped {summary.skipped} timelines with no markers.")
+
+    def _save_to_database(self, project_file_obj):
+        output_file_path = self._file_input_template("Enter a database file path to add the markers to: ", saving_file=True, append=True)
+        output_file = filemanagement.OutputFile([project_file_obj], "SQLite database", output_file_path)
+        print(f"Saved {output_file.row_counts['markers']} markers, {output_file.row_counts['clips']} clips "
+              f"and {output_file.row_counts['timelines']} timelines to {output_file.output_file_path}")
+        print(f"Search its markers with: fcpx-marker-tool --search '{output_file.output_file_path}'")
+
+    def _export_merged_timelines(self, project_file_obj):
+        sources = []
+        default_start = None
+
+        while True:
+            timeline = self._choose_timeline(project_file_obj)
+            if timeline is not None:
+                timecode_info = timeline.timecode_info
+                merged_start = self._merged_start_input_template(timeline, default_start)
+                # timeline marker times already include the timeline's own start timecode, so only the difference is added
+                sources.append(markerstream.MarkerSource(timeline, merged_start - timecode_info.as_fraction(timecode_info.start)))
+                # by default the next timeline starts right where this one ends
+                default_start = merged_start + timecode_info.as_fraction(timecode_info.duration)
+
+            if not self._yes_no_check("Add markers from another timeline? Y/N: "):
+                break
+            if self._yes_no_check("Is the timeline in a different file? Y/N: "):
+                project_file_obj = self._load_project_file() or project_file_obj
+
+        if sum(len(source.item.markers) for source in sources) == 0:
+            print("No markers found.")
+            return
+
+        output_formatting = self._choose_output_formatting()
+        marker_renderer = filemanagement.MarkerRenderer([output_formatting])
+        # markers are merged, formatted and written one at a time, so the combined marker list is never built
+        formatted_marker_list = (lines[0] for lines in marker_renderer.iter_lines(markerstream.merge_markers(sources)))
+        self._format_and_save_file(formatted_marker_list)
+
+    def _show_resource_usage(self, project_file_obj):
+        resources = [resource for resource in project_file_obj.resources if project_file_obj.get_resource_usage(resource.id) is not None]
+        pattern = input("Enter a media name or file path pattern to match, ex: *Interview*, or press Enter to list all media: ") or "*"
+        if pattern == "exit":
+            raise SystemExit(0)
+
+        resources = [resource for resource in resources
+                     if fnmatch.fnmatchcase(str(resource.name).lower(), pattern.lower()) or fnmatch.fnmatchcase(resource.file_path.lower(), pattern.lower())]
+        if not resources:
+            print("No media used by any clip matched the pattern.")
+            return
+
+        for index, resource in enumerate(resources):
+            print(f"{index + 1}. {resource.name} ({resource.file_path})")
+        resource = self._menu_selection_template("Select media by entering an option number: ", resources)
+
+        resource_usage = project_file_obj.get_resource_usage(resource.id)
+        output_formatting = self._choose_output_formatting()
+        markers_by_timeline = {}
+        for timeline, marker in resource_usage.timeline_markers:
+            markers_by_timeline.setdefault(timeline, []).append(marker)
+
+        timeline_clip_count = len(resource_usage.clips) - len(resource_usage.browser_clips)
+        usage_report = [
+            f"{resource.name} ({resource.file_path})",
+            f"Used by {len(resource_usage.browser_clips)} browser clips and {timeline_clip_count} clips in {len(resource_usage.timelines)} timelines"
+        ]
+        for timeline in resource_usage.timelines:
+            timeline_markers = markers_by_timeline.get(timeline, [])
+            usage_report += ["", f"{timeline.project_path / timeline.name} ({len(timeline_markers)} markers from this media)"]
+            usage_report += self._format_marker_list(timeline_markers, output_formatting)
+
+        self._format_and_save_file(usage_report)
+
+    MODE_OPTIONS = {
+        "Export markers from one timeline or clip": _export_single_item,
+        "Export markers from every timeline": _export_all_timelines,
+        "Merge markers from several timelines into one list": _export_merged_timelines,
+        "Save all markers to a SQLite database": _save_to_database,
+        "Find where a media file is used": _show_resource_usage
+    }
+
+    def _choose_mode(self, project_file_obj):
+        mode_choices = list(self.MODE_OPTIONS.keys())
+        if len(project_file_obj.get_timelines()) < 2:
+            mode_choices.remove("Export markers from every timeline")
+        if len(project_file_obj.get_timelines()) == 0:
+            mode_choices.remove("Merge markers from several timelines into one list")
+        if not project_file_obj.resource_usage:
+            mode_choices.remove("Find where a media file is used")
+
+        message = "Select a mode by entering an option number: "
+        return self._menu_selection_template(message, mode_choices, print_choices=True)
 
     def _multiple_source_check(self, project_file_obj):
 
         if len(project_file_obj.items) > 1:
-            filemanagement.DirectoryTree(project_file_obj.items).print_tree()
+            self._print_directory_tree(project_file_obj.items)
             marker_source = self._choose_marker_source(project_file_obj)
         else:
             try:
                 marker_source = project_file_obj.items[0]
             except IndexError:
                 print("Project contains no valid timelines, or clips")
+                marker_source = None
 
         return marker_source
 
+    def _print_directory_tree(self, item_list):
+        directory_tree = filemanagement.DirectoryTree(item_list)
+        tree_filters = self._choose_tree_filters() if len(item_list) > self.TREE_PAGE_SIZE else {}
+
+        # pages are rendered lazily, so only the portion of the tree that is actually viewed gets built
+        pages = directory_tree.iter_pages(self.TREE_PAGE_SIZE, **tree_filters)
+        page = next(pages, None)
+
+        if page is None:
+            print("No items matched the filter.")
+            return
+
+        print(".")
+        while page is not None:
+            for line in page:
+                print(line)
+            page = next(pages, None)
+            if page is not None and not self._continue_listing_check():
+                break
+
+    def _choose_tree_filters(self):
+        message = "This file contains a large number of items. Select how to list them by entering an option number: "
+        tree_filter = self._menu_selection_template(message, self.TREE_FILTER_OPTIONS, print_choices=True)
+
+        if tree_filter == "Timelines only":
+            return {'item_type': Timeline}
+        elif tree_filter == "Clips only":
+            return {'item_type': Clip}
+        elif tree_filter == "Filter by item name":
+            return {'name': input("Enter an item name or pattern to match, ex: *Interview*: ")}
+        elif tree_filter == "Filter by event name":
+            return {'folder': input("Enter an event name or pattern to match, ex: Day 1*: ")}
+        else:
+            return {}
+
+    def _continue_listing_check(self):
+        user_input = input("Press Enter to list more items, or type 's' to stop listing and make a selection: ")
+
+        if user_input == "exit":
+            raise SystemExit(0)
+
+        return user_input.lower() != 's'
+
+    def _choose_timeline(self, project_file_obj):
+        timelines = project_file_obj.get_timelines()
+
+        if len(timelines) == 0:
+            print("No timelines found.")
+            return None
+        elif len(timelines) == 1:
+            print(f"Using timeline '{timelines[0].name}'")
+            return timelines[0]
+
+        self._print_directory_tree(timelines)
+        message = "Select a timeline by entering an option number: "
+        return self._menu_selection_template(message, timelines)
+
+    def _merged_start_input_template(self, timeline, default_start=None):
+        # returns where the timeline starts in the merged list in seconds as a Fraction, entered as timecode in the timeline's frame rate.
+        # Without a default_start the timeline keeps its own start timecode
+        timecode_info = timeline.timecode_info
+        default_start = default_start if default_start is not None else timecode_info.as_fraction(timecode_info.start)
+        default_timecode = timecode_info.as_timecode(timecode_info.timebase * default_start.numerator // default_start.denominator,
+                                                     timecode_info.frame_rate, timecode_info.non_drop_frame)
+
+        while True:
+            user_input = input(f"Enter where '{timeline.name}' starts in the merged list as timecode, or press Enter for {default_timecode}: ")
+
+            if user_input == "exit":
+                raise SystemExit(0)
+            elif user_input == "":
+                return default_start
+
+            try:
+                frames = Timecode(timecode_info.frame_rate, user_input, force_non_drop_frame=timecode_info.non_drop_frame).frames - 1
+            except (ValueError, IndexError):
+                print("Error: timecode must be formatted as HH:MM:SS:FF")
+                continue
+
+            return Fraction(frames * timecode_info.frame_rate[1], timecode_info.frame_rate[0])
+
     def _choose_marker_source(self, project_file_obj):
         message = "More than one timeline or clip was found. Select an item to parse by entering an option number: "
         return self._menu_selection_template(message, project_file_obj.items)
@@ -48,17 +361,9 @@ class MenuBasedCLI:
         return output_formatting
 
     def _format_marker_list(self, marker_list, output_formatting):
-        formatted_marker_list = []
-
-        sorted_marker_list = sorted(marker_list, key=lambda marker: marker.timecode_info.start.as_fraction)
+        return filemanagement.OutputFormatting.format_marker_list(marker_list, output_formatting)
 
-        for marker in sorted_marker_list:
-            marker_string = filemanagement.OutputFormatting(marker, output_formatting).formatted
-            formatted_marker_list.append(marker_string)
-
-        return formatted_marker_list
-
-    def _file_input_template(self, message, saving_file=False):
+    def _file_input_template(self, message, saving_file=False, append=False):
 
         while True:
             user_input = input(message)
@@ -70,7 +375,7 @@ class MenuBasedCLI:
 
             if saving_file:
                 try:
-                    return file_path.set_save_location()
+                    return file_path.set_save_location(overwrite=append)
                 except FileExistsError:
                     if self._rewrite_check():
                         return file_path.set_save_location(overwrite=True)
@@ -84,9 +389,30 @@ class MenuBasedCLI:
             else:
                 raise ValueError
 
-    def _rewrite_check(self):
+    def _directory_input_template(self, message):
+
+        while True:
+            user_input = input(message)
+
+            if user_input == "exit":
+                raise SystemExit(0)
+
+            directory_path = filemanagement.InputHandler(user_input).user_input_path
+
+            # a directory that doesn't exist yet is fine as long as its parent does, it will be created when saving
+            if directory_path.is_dir() or (not directory_path.exists() and directory_path.parent.exists()):
+                return directory_path
+            else:
+                print("Error: not a valid directory")
+
+    def _rewrite_check(self, multiple_files=False):
+        message = "Some of these files already exist" if multiple_files else "This file already exists"
+        return self._yes_no_check(f"{message}, would you like to rewrite? Y/N: ")
+
+    def _yes_no_check(self, message):
+
         while True:
-            user_input = input("This file already exists, would you like to rewrite? Y/N: ")
+            user_input = input(message)
 
             if user_input == "exit":
                 raise SystemExit(0)
@@ -135,7 +461,7 @@ class MenuBasedCLI:
 
     def _format_and_save_file(self, formatted_marker_list):
         message = "Select a file export type by entering an option number: "
-        choices_list = list(filemanagement.OutputFile.FILE_FORMAT_OPTIONS.keys())
+        choices_list = [option for option in filemanagement.OutputFile.FILE_FORMAT_OPTIONS if option not in filemanagement.OutputFile.PROJECT_FILE_FORMAT_OPTIONS]
         file_format = self._menu_selection_template(message, choices_list, print_choices=True)
 
         if file_format != "Print":
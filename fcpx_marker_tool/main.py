@@ -1,8 +1,51 @@
+import argparse
+from pathlib import Path
 from fcpx_marker_tool.interface import cli
+from fcpx_marker_tool.parsers.parsefilter import ParseFilter
 
-def main():
-    interface = cli.MenuBasedCLI()
-    interface.run_cli()
+def create_argument_parser():
+    argument_parser = argparse.ArgumentParser(prog='fcpx-marker-tool', description='Parse, display, and save marker metadata from FCPXML files.')
+
+    filter_group = argument_parser.add_argument_group('parse filters', 'only parse matching parts of the file, patterns are case-insensitive globs')
+    filter_group.add_argument('--event', help="only parse events with a matching name, ex: 'Day 1*'")
+    filter_group.add_argument('--project', help="only parse timelines and clips with a matching name")
+    filter_group.add_argument('--item-type', choices=ParseFilter.ITEM_TYPES, help="only parse timelines or clips")
+    filter_group.add_argument('--marker-type', action='append', choices=ParseFilter.MARKER_TYPES, dest='marker_types',
+                              help="only parse markers of this type, can be used more than once")
+    completed_group = filter_group.add_mutually_exclusive_group()
+    completed_group.add_argument('--completed', action='store_true', default=None, help="only keep completed to-do markers")
+    completed_group.add_argument('--not-completed', action='store_false', dest='completed', help="only keep incomplete to-do markers")
+    filter_group.add_argument('--dedup', choices=ParseFilter.DUPLICATE_POLICIES, default='keep-first',
+                              help="'keep-first' (default) drops timeline markers repeated by overlapping or reused clips, 'keep-all' keeps "
+                                   "every copy as versions before this option did")
+    filter_group.add_argument('--dedup-tolerance', type=int, default=0, metavar='FRAMES',
+                              help="treat timeline markers with the same name, type, and completed status this many frames apart as duplicates")
+
+    argument_parser.add_argument('--search', type=Path, metavar='DATABASE',
+                                 help="search marker names in a SQLite database saved by this tool instead of parsing a file")
+
+    limit_group = argument_parser.add_argument_group('parse limits', 'stop parsing early and continue with the items parsed so far')
+    limit_group.add_argument('--time-budget', type=float, metavar='SECONDS', help="stop parsing after this many seconds")
+    limit_group.add_argument('--memory-budget', type=float, metavar='MB', help="stop parsing once traced memory use passes this many megabytes, "
+                             "files expected to need more are parsed one event at a time or refused before loading")
+
+    return argument_parser
+
+def main(argv=None):
+    argument_parser = create_argument_parser()
+    args = argument_parser.parse_args(argv)
+    try:
+        parse_filter = ParseFilter(args.event, args.project, args.item_type, args.marker_types, args.completed,
+                                   args.dedup, args.dedup_tolerance)
+    except ValueError as error:
+        argument_parser.error(str(error))
+
+    memory_budget = int(args.memory_budget * 1024 * 1024) if args.memory_budget is not None else None
+
+    interface = cli.MenuBasedCLI(parse_filter, args.time_budget, memory_budget)
+    if args.search is not None:
+        return interface.run_search_cli(args.search)
+    return interface.run_cli()
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
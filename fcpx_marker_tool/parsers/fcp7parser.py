@@ -1,7 +1,9 @@
 class FCP7Parser:
 
-    def __init__(self, xml_root):
+    def __init__(self, xml_root, parse_filter=None, progress=None):
         self.xml_root = xml_root
+        self.parse_filter = parse_filter
+        self.progress = progress
 
     def parse_xml(self):
         print("FCP7 support will be added in a future version.")
\ No newline at end of file
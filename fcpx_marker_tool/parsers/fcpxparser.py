@@ -1,24 +1,91 @@
 import copy
+import itertools
+import math
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ThreadPoolExecutor
 from fractions import Fraction
 from pathlib import Path
+from typing import NamedTuple
+from timecode import Timecode
 from fcpx_marker_tool.common.projectclasses import ProjectFile, Resource, Timeline, Clip, Marker
 from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+from fcpx_marker_tool.parsers.parsefilter import ParseFilter
+from fcpx_marker_tool.parsers.parseprogress import ParseProgress, ParseCancelled, ProgressReader
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
 
 class FCPXParser:
 
-    def __init__(self, xml_root):
+    # Matches up values based on Apple's documentation:
+    # https://developer.apple.com/documentation/professional_video_applications/fcpxml_reference/story_elements/conform-rate
+    CONFORM_RATE_DICTIONARY = {
+        # timeline_frame_rate: {source_frame_rate: conformed_frame_rate}
+        '23.98p': {'24': (2400, 100), '25': (2500, 100), '50': (2500, 100)},
+        '24p': {'23.98': (24000, 1001), '25': (2500, 100), '50': (2500, 100)},
+        '25p': {'23.98': (24000, 1001), '24': (2400, 100)},
+        '29.97p': {'30': (3000, 100), '60': (3000, 100)},
+        '30p': {'29.97': (30000, 1001), '59.94': (30000, 1001)},
+        '50p': {'23.98': (48000, 1001), '24': (4800, 100)},
+        '59.94p': {'30': (6000, 100), '60': (6000, 100)},
+        '60p': {'29.97': (60000, 1001), '59.94': (60000, 1001)},
+        '25i': {'23.98': (48000, 1001), '24': (4800, 100)},
+        '29.97i': {'30': (6000, 100), '60': (6000, 100)}
+    }
+
+    # attributes holding rational time values, used to find a timebase that represents all of them as integers
+    TIME_ATTRIBUTES = ('start', 'duration', 'offset', 'tcStart')
+    # largest timebase that still holds 24 hours of ticks in a signed 64-bit integer, which is what SQLite and MarkerTable store
+    MAX_TIMEBASE = (2 ** 63 - 1) // (24 * 60 * 60)
+
+    load_strategy = 'tree'
+
+    def __init__(self, xml_root, parse_filter=None, progress=None):
         self.xml_root = xml_root
+        self._parse_filter = parse_filter if parse_filter is not None else ParseFilter()
+        # the callback and budgets used by parse_xml calls that aren't given a ParseProgress of their own
+        self.progress = progress if progress is not None else ParseProgress()
+        # traced memory still held from loading the document, counted toward each parse's memory budget
+        self._loaded_memory = self.progress.retained_memory or 0
+        self._loading_peak_memory = self.progress.peak_memory
+        self.timebase = self._get_timebase()
         self._project_file = self._create_project_file()
-        self.current_path = self.project_file.project_path
+        # resources are parsed once and shared by every parse_xml call, the lock keeps concurrent calls from building them twice
+        self._resources = None
+        self._resources_lock = threading.Lock()
+        # {signature of a clip's marker elements and frame rate settings: tuple of Marker objects}, shared by every parse_xml call
+        self._marker_cache = {}
+        self._marker_cache_lock = threading.Lock()
+        self._marker_cache_hits = 0
+        self._marker_cache_misses = 0
 
     # PROJECT FILE
     @property
     def project_file(self):
         return self._project_file
 
+    @property
+    def parse_filter(self):
+        # read-only since cached markers were filtered with it, create a new parser to parse with a different filter
+        return self._parse_filter
+
+    @property
+    def marker_cache_stats(self):
+        with self._marker_cache_lock:
+            return CacheStats(self._marker_cache_hits, self._marker_cache_misses, len(self._marker_cache))
+
     def _create_project_file(self):
         name, file_path = self._get_project_info()
-        return ProjectFile(name, file_path)
+        return ProjectFile(name, file_path, timebase=self.timebase)
 
     def _get_project_info(self):
         library = self.xml_root.find('library')
@@ -30,26 +97,62 @@ class FCPXParser:
 
         return name, file_path
 
-    def _create_project_items(self):
-        events = self.xml_root.findall('./library/event')
-
-        for event in events:
-            self.current_path = self.project_file.project_path.joinpath(f"{event.get('name')}")
-            event_children = self._parse_event(event)
-            self.project_file.items.extend(event_children)
+    def _get_events(self, progress=None):
+        # events that don't match the parse filter are skipped here, so nothing inside them is ever parsed
+        for event in self.xml_root.iterfind('./library/event'):
+            if self.parse_filter.match_event(event.get('name')):
+                yield event
+
+    def _create_project_items(self, project_file, progress, executor=None):
+        # adds Clip and Timeline objects to project_file in document order, when an executor is given timelines are built on it concurrently.
+        # Items are only added from this thread, so project_file's resource usage index is built the same way either way.
+        # If the parse is cancelled, every item finished before the first unfinished one is still added before ParseCancelled is raised again.
+        pending_items = []
+        cancelled = None
+
+        try:
+            for event in self._get_events(progress):
+                progress.add(events=1)
+                event_path = project_file.project_path.joinpath(f"{event.get('name')}")
+                for event_child in self._parse_event(event, event_path, progress, executor):
+                    pending_items.append(event_child)
+        except ParseCancelled as error:
+            cancelled = error
+
+        for item in pending_items:
+            if isinstance(item, Future):
+                try:
+                    item = item.result()
+                except ParseCancelled as error:
+                    cancelled = cancelled or error
+                    break
+            project_file.add_item(item)
+
+        if cancelled is not None:
+            raise cancelled
 
     # RESOURCES
+    def _get_resources(self):
+        # returns {resource_id: Resource}
+        with self._resources_lock:
+            if self._resources is None:
+                self._resources = self._create_resources()
+        return self._resources
+
     def _create_resources(self):
         resources = self.xml_root.find('resources')
         if resources is None:
             raise ValueError("'resources' element not found")
 
+        resource_objs = {}
         for resource in resources:
             if resource.tag == 'asset' or resource.tag == 'media':
                 id, name, path, start, duration, format, non_drop_frame = self._filter_resource_type(resource)
                 frame_rate_tuple, interlaced = self._frame_info_from_format(format)
                 timecode_info = self._create_timecode_info(frame_rate_tuple, start, duration, offset=0, non_drop_frame=non_drop_frame)
-                self.project_file.add_resource(Resource(id, name, path, timecode_info, interlaced))
+                resource_objs[id] = Resource(id, name, path, timecode_info, interlaced)
+
+        return resource_objs
 
     def _filter_resource_type(self, resource):
         if resource.tag == 'asset':
@@ -123,24 +226,47 @@ class FCPXParser:
         duration_tuple = self._parse_frame_info(duration)
         offset_tuple = self._parse_frame_info(offset)
 
-        timecode_info = TimecodeInfo(frame_rate, start_tuple, duration_tuple, offset_tuple, non_drop_frame, conformed_frame_rate)
+        timecode_info = TimecodeInfo(frame_rate, start_tuple, duration_tuple, offset_tuple, non_drop_frame, conformed_frame_rate, self.timebase)
         
         return timecode_info
 
     # EVENTS
-    def _parse_event(self, event):
-        # parse clip and project elements, return an array of Clip and Timeline objects
-        event_children = []
+    def _parse_event(self, event, project_path, progress, executor=None):
+        # parse clip and project elements, yields Clip and Timeline objects (or Futures for Timelines if an executor is given)
+        skipped_children = 0
         for event_child in event:
-            event_children.append(self._parse_event_children(event_child))
-        return event_children
+            item_type = self._get_item_type(event_child)
+            # other event children like keyword collections don't contain markers
+            if item_type is not None and self.parse_filter.match_item(item_type, event_child.get('name')):
+                yield self._parse_event_children(event_child, project_path, progress, executor)
+            else:
+                skipped_children += self._get_progress_weight(event_child)
+        progress.add(items_done=skipped_children)
+
+    def _get_progress_weight(self, event_child):
+        # rough amount of work an event child takes to parse, so progress and ETA aren't thrown off by large timelines
+        if event_child.tag == 'project':
+            spine = event_child.find('./sequence/spine')
+            return 1 + (len(spine) if spine is not None else 0)
+        return 1
+
+    def _get_item_type(self, event_child):
+        if event_child.tag.endswith('clip'):
+            return 'clip'
+        elif event_child.tag == 'project':
+            return 'timeline'
+        else:
+            return None
     
-    def _parse_event_children(self, event_child):
+    def _parse_event_children(self, event_child, project_path, progress, executor=None):
         if event_child.tag.endswith('clip'):
-            parsed_event_child = self._handle_clip_and_marker_creation(event_child)
-            # self._add_markers_to_clip(event_child, parsed_event_child)
+            parsed_event_child = self._handle_clip_and_marker_creation(event_child, project_path, progress)
+            progress.add(items_done=1)
         elif event_child.tag == 'project':
-            parsed_event_child = self._create_timeline(event_child)
+            if executor is not None:
+                parsed_event_child = executor.submit(self._create_timeline, event_child, project_path, progress)
+            else:
+                parsed_event_child = self._create_timeline(event_child, project_path, progress)
 
         return parsed_event_child
 
@@ -160,8 +286,8 @@ class FCPXParser:
         else:
             return None
 
-    def _handle_clip_and_marker_creation(self, clip_element, timeline_obj=None):
-        name, start, duration, offset, type, resource_id = self._get_common_clip_info(clip_element)
+    def _handle_clip_and_marker_creation(self, clip_element, project_path, progress, timeline_obj=None, attribute_overrides=None):
+        name, start, duration, offset, type, resource_id = self._get_common_clip_info(clip_element, attribute_overrides)
         frame_rate_tuple, non_drop_frame, interlaced = self._get_clip_format_info(clip_element, resource_id, timeline_obj)
 
         if timeline_obj is not None:
@@ -175,13 +301,16 @@ class FCPXParser:
             timecode_info = self._create_timecode_info(frame_rate_tuple, start, duration, offset, non_drop_frame)
             conformed_frame_rate = None
 
-        clip_obj = Clip(name, type, timecode_info, self.current_path, interlaced, resource_id)
+        clip_obj = Clip(name, type, timecode_info, project_path, interlaced, resource_id)
         self._add_markers_to_clip(clip_element, clip_obj, conformed_frame_rate)
+        progress.add(clips=1, markers=len(clip_obj.markers))
 
         return clip_obj
 
-    def _get_common_clip_info(self, clip_element):
+    def _get_common_clip_info(self, clip_element, attribute_overrides=None):
         name, start, duration, offset = self._get_attributes(clip_element, 'name', 'start', 'duration', 'offset')
+        if attribute_overrides:
+            offset = attribute_overrides.get('offset', offset)
         type = clip_element.tag
         resource_id = self._get_resource_id(clip_element)
         resource_id = self._validate_resource(resource_id)
@@ -216,24 +345,7 @@ class FCPXParser:
         return conformed_frame_rate
 
     def _parse_conformed_frame_rate(self, timeline_frame_rate, source_frame_rate):
-        # Matches up values based on Apple's documentation:
-        # https://developer.apple.com/documentation/professional_video_applications/fcpxml_reference/story_elements/conform-rate
-
-        CONFORM_RATE_DICTIONARY = {
-            # timeline_frame_rate: {source_frame_rate: conformed_frame_rate}
-            '23.98p': {'24': (2400, 100), '25': (2500, 100), '50': (2500, 100)},
-            '24p': {'23.98': (24000, 1001), '25': (2500, 100), '50': (2500, 100)},
-            '25p': {'23.98': (24000, 1001), '24': (2400, 100)},
-            '29.97p': {'30': (3000, 100), '60': (3000, 100)},
-            '30p': {'29.97': (30000, 1001), '59.94': (30000, 1001)},
-            '50p': {'23.98': (48000, 1001), '24': (4800, 100)},
-            '59.94p': {'30': (6000, 100), '60': (6000, 100)},
-            '60p': {'29.97': (60000, 1001), '59.94': (60000, 1001)},
-            '25i': {'23.98': (48000, 1001), '24': (4800, 100)},
-            '29.97i': {'30': (6000, 100), '60': (6000, 100)}
-        }
-
-        timeline_frame_rate_match = CONFORM_RATE_DICTIONARY.get(timeline_frame_rate)
+        timeline_frame_rate_match = self.CONFORM_RATE_DICTIONARY.get(timeline_frame_rate)
 
         if timeline_frame_rate_match is not None:
             conformed_frame_rate = timeline_frame_rate_match.get(source_frame_rate)
@@ -267,12 +379,10 @@ class FCPXParser:
 
     def _parse_ref_info(self, resource_id):
         # Find Resource with an id matching 'ref', grab the frame rate and tcformat from there.
-        for resource in self.project_file.resources:
-            if resource.id == resource_id:
-                frame_rate = resource.timecode_info.frame_rate
-                non_drop_frame = resource.timecode_info.non_drop_frame
-                interlaced = resource.interlaced
-                break
+        resource = self._get_resources()[resource_id]
+        frame_rate = resource.timecode_info.frame_rate
+        non_drop_frame = resource.timecode_info.non_drop_frame
+        interlaced = resource.interlaced
 
         return frame_rate, non_drop_frame, interlaced
 
@@ -284,11 +394,12 @@ class FCPXParser:
             return True
 
     # TIMELINES
-    def _create_timeline(self, timeline_element):
+    def _create_timeline(self, timeline_element, project_path, progress):
         # Grab metadata, create timeline instance
         name, timecode_info, interlaced = self._get_timeline_info(timeline_element)
-        timeline_obj = Timeline(name, timecode_info, self.current_path, interlaced)
-        self._handle_timeline_clip_creation(timeline_element, timeline_obj)
+        timeline_obj = Timeline(name, timecode_info, project_path, interlaced)
+        self._handle_timeline_clip_creation(timeline_element, timeline_obj, progress)
+        progress.add(items_done=self._get_progress_weight(timeline_element), projects=1)
 
         return timeline_obj
 
@@ -302,50 +413,90 @@ class FCPXParser:
 
         return name, timecode_info, interlaced
 
-    def _add_clips_and_markers_to_timeline(self, timeline_obj, primary_clip, connected_clip=None):
+    def _add_clips_and_markers_to_timeline(self, timeline_obj, primary_clip, connected_clip=None, added_markers=None):
         if connected_clip:
             connected, primary = connected_clip.timecode_info, primary_clip.timecode_info
-            connected.offset = connected.offset.as_fraction + primary.offset.as_fraction - primary.start.as_fraction
+            connected.offset = connected.offset + primary.offset - primary.start
             clip_obj = connected_clip
 
         else:
             clip_obj = primary_clip
 
         timeline_obj.add_clip(clip_obj)
-        self._add_markers_to_timeline(timeline_obj, clip_obj)
+        self._add_markers_to_timeline(timeline_obj, clip_obj, added_markers)
 
-    def _handle_timeline_clip_creation(self, timeline_element, timeline_obj):
+    def _handle_timeline_clip_creation(self, timeline_element, timeline_obj, progress):
 
         primary_clips = timeline_element.iterfind('./sequence/spine/')
         primary_clips_formatted = [self._check_for_audition(clip) for clip in primary_clips]
+        project_path = timeline_obj.project_path
+        # {(start bucket, name, marker type): start} for every marker added to the timeline so far, None when duplicates are kept
+        added_markers = {} if self.parse_filter.duplicate_markers == 'keep-first' else None
 
-        for primary_clip in primary_clips_formatted:
-            primary_clip_obj = self._handle_clip_and_marker_creation(primary_clip, timeline_obj)
-            self._add_clips_and_markers_to_timeline(timeline_obj, primary_clip_obj)
+        for primary_clip, primary_overrides in primary_clips_formatted:
+            primary_clip_obj = self._handle_clip_and_marker_creation(primary_clip, project_path, progress, timeline_obj, primary_overrides)
+            self._add_clips_and_markers_to_timeline(timeline_obj, primary_clip_obj, added_markers=added_markers)
 
             for connected_clip in primary_clip.iterfind('*[@lane]'):
-                connected_clip_formatted = self._check_for_audition(connected_clip)
-                connected_clip_obj = self._handle_clip_and_marker_creation(connected_clip_formatted, timeline_obj)
-                self._add_clips_and_markers_to_timeline(timeline_obj, primary_clip_obj, connected_clip_obj)
+                connected_clip_formatted, connected_overrides = self._check_for_audition(connected_clip)
+                connected_clip_obj = self._handle_clip_and_marker_creation(connected_clip_formatted, project_path, progress, timeline_obj, connected_overrides)
+                self._add_clips_and_markers_to_timeline(timeline_obj, primary_clip_obj, connected_clip_obj, added_markers)
 
     def _check_for_audition(self, clip_element):
+        # returns the clip element to parse and attributes that should be used in place of its own,
+        # the active clip of an audition takes its offset and lane from the audition, the xml tree itself is never modified
         if clip_element.tag == 'audition':
             offset, lane = self._get_attributes(clip_element, 'offset', 'lane')
-            updated_clip = clip_element.find('./')
-            
-            updated_clip.set('offset', offset)
+            attribute_overrides = {'offset': offset}
             if lane is not None:
-                updated_clip.set('lane', lane)
-                
-            return updated_clip
+                attribute_overrides['lane'] = lane
+
+            return clip_element.find('./'), attribute_overrides
         else:
-            return clip_element
+            return clip_element, None
 
     def _add_markers_to_clip(self, clip_element, clip_obj, conformed_frame_rate=None):
-        for child_element in clip_element.iterfind('./'):
-            if child_element.tag.endswith('marker'):
-                marker = self._create_marker(child_element, clip_obj, conformed_frame_rate)
-                clip_obj.add_marker(marker)
+        marker_elements = [child_element for child_element in clip_element.iterfind('./') if child_element.tag.endswith('marker')]
+        if not marker_elements:
+            return
+
+        # Markers only depend on the clip's frame rate settings and their own attributes, so the same media used as a browser clip
+        # and across many timelines gets its markers built once. Marker objects are shared between those clips and must not be modified.
+        cache_key = self._get_marker_cache_key(marker_elements, clip_obj, conformed_frame_rate)
+        markers = self._marker_cache.get(cache_key)
+
+        if markers is None:
+            filters_markers = self.parse_filter.filters_markers
+            markers = tuple(self._create_marker(marker_element, clip_obj, conformed_frame_rate) for marker_element in marker_elements
+                            if not filters_markers or self._match_marker_element(marker_element))
+            self._marker_cache[cache_key] = markers
+            self._count_marker_cache_lookup(hit=False)
+        else:
+            self._count_marker_cache_lookup(hit=True)
+
+        clip_obj.markers.extend(markers)
+
+    def _get_marker_cache_key(self, marker_elements, clip_obj, conformed_frame_rate):
+        clip_info = clip_obj.timecode_info
+        marker_signatures = tuple((marker_element.tag, tuple(marker_element.attrib.items())) for marker_element in marker_elements)
+        # the filter's marker settings are part of the key as the ParseFilter object itself can still be changed between parses
+        marker_selection = (self.parse_filter.marker_types, self.parse_filter.completed)
+        return (clip_info.frame_rate, clip_info.non_drop_frame, conformed_frame_rate, marker_selection, marker_signatures)
+
+    def _count_marker_cache_lookup(self, hit):
+        with self._marker_cache_lock:
+            if hit:
+                self._marker_cache_hits += 1
+            else:
+                self._marker_cache_misses += 1
+
+    def _match_marker_element(self, marker_element):
+        completed = marker_element.get('completed')
+
+        if completed is not None:
+            return self.parse_filter.match_marker("to-do", bool(int(completed)))
+        else:
+            return self.parse_filter.match_marker(marker_element.tag, None)
 
     def _create_marker(self, marker_element, clip_obj, conformed_frame_rate=None):
         frame_rate_tuple, non_drop_frame = clip_obj.timecode_info.frame_rate, clip_obj.timecode_info.non_drop_frame
@@ -361,28 +512,104 @@ class FCPXParser:
 
         return Marker(name, marker_type, timecode_info, completed)
 
-    def _add_markers_to_timeline(self, timeline_obj, clip_obj):
+    def _add_markers_to_timeline(self, timeline_obj, clip_obj, added_markers=None):
+        clip_info, timeline_info = clip_obj.timecode_info, timeline_obj.timecode_info
+        timeline_rate = Fraction(*timeline_info.frame_rate)
+        clip_rate = Fraction(*clip_info.conformed_frame_rate) if clip_info.conform_rate_check else timeline_rate
+        # clip start converted to timeline ticks, the timebase is chosen so that this is always an exact integer
+        clip_scale = clip_rate / timeline_rate
+        clip_start = clip_info.start * clip_scale.numerator // clip_scale.denominator
+        clip_offset, clip_end = clip_info.offset, clip_info.offset + clip_info.duration
+        if added_markers is not None:
+            frame_rate_numerator, frame_rate_denominator = timeline_info.frame_rate
+            tolerance = self.parse_filter.duplicate_tolerance * timeline_info.timebase * frame_rate_denominator // frame_rate_numerator
+
         for marker in clip_obj.markers:
-            clip_start, clip_offset, clip_duration = clip_obj.timecode_info.start, clip_obj.timecode_info.offset, clip_obj.timecode_info.duration
-            timeline_rate = Fraction(*timeline_obj.timecode_info.frame_rate)
-            marker_rate = Fraction(*marker.timecode_info.conformed_frame_rate) if marker.timecode_info.conform_rate_check else timeline_rate
-            clip_rate = Fraction(*clip_obj.timecode_info.conformed_frame_rate) if clip_obj.timecode_info.conform_rate_check else timeline_rate
-            marker_start_fraction = marker.timecode_info.start.as_fraction * marker_rate
-            clip_start_fraction = clip_start.as_fraction * clip_rate
-            clip_offset_fraction = clip_offset.as_fraction * timeline_rate
-            # compare rational time values for accuracy when dealing with markers on a subframe level
-            clip_end_fraction = clip_offset_fraction + (clip_duration.as_fraction * timeline_rate)
-            frame_duration = Fraction(timeline_rate.denominator, timeline_rate.numerator)
-            marker_timeline_start_fraction = ((marker_start_fraction - clip_start_fraction) + clip_offset_fraction)
-
-            if (marker_timeline_start_fraction >= clip_offset_fraction) and (marker_timeline_start_fraction < clip_end_fraction):
-                timeline_marker = copy.deepcopy(marker)
-                t_marker, t_obj = timeline_marker.timecode_info, timeline_obj.timecode_info
-                t_marker.frame_rate, t_marker.non_drop_frame, t_marker.start = t_obj.frame_rate, t_obj.non_drop_frame, (marker_timeline_start_fraction * frame_duration)
+            marker_info = marker.timecode_info
+            marker_scale = Fraction(*marker_info.conformed_frame_rate) / timeline_rate if marker_info.conform_rate_check else 1
+            # compare integer ticks for accuracy when dealing with markers on a subframe level
+            marker_timeline_start = (marker_info.start * marker_scale.numerator // marker_scale.denominator) - clip_start + clip_offset
+
+            if (marker_timeline_start >= clip_offset) and (marker_timeline_start < clip_end):
+                if added_markers is not None and self._check_duplicate_marker(added_markers, marker, marker_timeline_start, tolerance):
+                    continue
+                timeline_marker = copy.copy(marker)
+                timeline_marker.timecode_info = t_marker = copy.copy(marker_info)
+                t_marker.frame_rate, t_marker.non_drop_frame, t_marker.start = timeline_info.frame_rate, timeline_info.non_drop_frame, marker_timeline_start
                 t_marker.conformed_frame_rate = None
+                timeline_marker.source_clip = clip_obj
                 timeline_obj.add_marker(timeline_marker)
 
+    def _check_duplicate_marker(self, added_markers, marker, start, tolerance):
+        # Returns True if a marker with the same name, type, and completed status was added within tolerance ticks of start,
+        # otherwise records this one.
+        # Starts are bucketed by tolerance so a match can only be in the same or a neighbouring bucket, and since any two starts
+        # in one bucket are within tolerance of each other, each bucket only ever holds one added marker.
+        bucket_size = tolerance or 1
+        bucket = start // bucket_size
+        neighbouring_buckets = (bucket - 1, bucket, bucket + 1) if tolerance else (bucket,)
+
+        for neighbouring_bucket in neighbouring_buckets:
+            added_start = added_markers.get((neighbouring_bucket, marker.name, marker.marker_type, marker.completed))
+            if added_start is not None and abs(start - added_start) <= tolerance:
+                return True
+
+        added_markers[(bucket, marker.name, marker.marker_type, marker.completed)] = start
+        return False
+
     # HELPERS
+    def _get_timebase(self):
+        # Returns the number of ticks per second used for every TimecodeInfo in the project file.
+        # It has to represent each rational time in the document as an integer, and conformed clips scale their times by
+        # conformed_rate / timeline_rate, so the times that get scaled need to stay exact integers after scaling too.
+        denominators = set()
+        parsed_elements = itertools.chain(self.xml_root.iterfind('resources'), self._get_events())
+        self._collect_time_denominators(parsed_elements, denominators)
+        return self._calculate_timebase(denominators)
+
+    def _collect_time_denominators(self, parsed_elements, denominators):
+        # adds the denominator of every rational time inside parsed_elements to denominators
+        for parsed_element in parsed_elements:
+            conform_rate_found = False
+            for element in parsed_element.iter():
+                if element.tag == 'conform-rate':
+                    conform_rate_found = True
+                for attribute in self.TIME_ATTRIBUTES:
+                    time_value = element.get(attribute)
+                    if time_value is not None and '/' in time_value:
+                        denominators.add(int(time_value.rstrip('s').split('/')[1]))
+            if conform_rate_found:
+                self._collect_conformed_denominators(parsed_element, denominators)
+
+    def _collect_conformed_denominators(self, parsed_element, denominators):
+        # A conformed clip's start and its markers' starts are multiplied by the conformed/timeline rate ratio, so for each of those
+        # times the timebase has to be a multiple of its denominator times the ratio's denominator. Only clips in timelines are
+        # conformed, and only the rate pairs that actually occur are added, since every pair multiplies the timebase.
+        for sequence_element in parsed_element.iterfind('./project/sequence'):
+            timeline_frame_rate, timeline_interlaced = self._frame_info_from_format(sequence_element.get('format'))
+            timeline_frame_rate_string = Timecode(timeline_frame_rate).framerate
+            for clip_element in sequence_element.iterfind('.//conform-rate/..'):
+                conformed_frame_rate = self._conform_rate_check(clip_element, timeline_frame_rate, timeline_frame_rate_string, timeline_interlaced)
+                if not isinstance(conformed_frame_rate, tuple):
+                    continue
+                scale_denominator = (Fraction(*conformed_frame_rate) / Fraction(*timeline_frame_rate)).denominator
+                scaled_elements = itertools.chain((clip_element,), (child for child in clip_element if child.tag.endswith('marker')))
+                for scaled_element in scaled_elements:
+                    start = self._parse_frame_info(scaled_element.get('start'))
+                    denominators.add(start[1] * scale_denominator)
+
+    def _calculate_timebase(self, denominators):
+        timebase = math.lcm(*denominators)
+
+        if timebase > self.MAX_TIMEBASE:
+            raise ValueError(f"The times in this file need a timebase of {timebase} ticks per second to be exact, "
+                             f"over the {self.MAX_TIMEBASE} that keeps 24 hours within a 64-bit integer")
+
+        return timebase
+
+    def _get_total_progress_weight(self):
+        return sum(self._get_progress_weight(event_child) for event in self._get_events() for event_child in event)
+
     def _parse_frame_info(self, frame_info, reverse=False):
         # Preps frame info for timecode module, ex: the string "1001/30000s" becomes a tuple (30000, 1001) if reverse=True, while a string "10s" becomes (10,1)
 
@@ -407,8 +634,112 @@ class FCPXParser:
         attribute_value = [element.get(arg) for arg in args]
         return attribute_value
 
-    def parse_xml(self):
-        self._create_resources()
-        self._create_project_items()
-
-        return self.project_file
\ No newline at end of file
+    def parse_xml(self, max_workers=None, progress=None):
+        # Each call builds a new ProjectFile and tracks its own progress, so one parser can be used from several threads or parse the same
+        # document more than once. progress is restarted for this call, without it a copy of self.progress's callback and budgets is used.
+        # With max_workers, timelines are built concurrently on a thread pool, items keep their document order either way.
+        # If progress is cancelled or runs over budget, ParseCancelled is raised with the items parsed so far as its partial_result.
+        progress = progress if progress is not None else self.progress.copy()
+        project_file = self._create_project_file()
+        for resource in self._get_resources().values():
+            project_file.add_resource(resource)
+
+        progress.start(self._loaded_memory)
+        try:
+            progress.start_phase('parsing', self._get_total_progress_weight())
+            if max_workers is None:
+                self._create_project_items(project_file, progress)
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    self._create_project_items(project_file, progress, executor)
+        except ParseCancelled as error:
+            error.partial_result = project_file
+            raise
+        finally:
+            progress.finish()
+            project_file.load_strategy = self.load_strategy
+            peak_memories = [peak_memory for peak_memory in (self._loading_peak_memory, progress.peak_memory) if peak_memory is not None]
+            project_file.peak_memory = max(peak_memories, default=None)
+
+        self._project_file = project_file
+        return project_file
+
+class StreamingFCPXParser(FCPXParser):
+    """FCPXParser that reads the document incrementally, so only one event's elements are held in memory at a time.
+
+    The file is read twice: first to find the timebase and progress total while discarding every event as soon as it's been
+    read, then again while parsing, when each event is parsed as soon as it has been read and discarded afterwards.
+    Only the library and resources elements are kept for the life of the parser.
+    """
+
+    load_strategy = 'streaming'
+
+    def __init__(self, xml_file, parse_filter=None, progress=None):
+        self.xml_file = xml_file
+        parse_filter = parse_filter if parse_filter is not None else ParseFilter()
+        progress = progress if progress is not None else ParseProgress()
+        self._denominators = set()
+        self._total_progress_weight = 0
+
+        # the first pass is a loading run of its own, like XMLParser reading a whole document
+        progress.start()
+        try:
+            progress.start_phase('loading', os.path.getsize(xml_file))
+            xml_root = self._scan_document(parse_filter, progress)
+        finally:
+            progress.finish()
+
+        super().__init__(xml_root, parse_filter, progress)
+
+    def _scan_document(self, parse_filter, progress):
+        # returns the root element, which only keeps resources and the library's attributes and non-event children
+        xml_root = None
+        for xml_root, element in self._iter_document(progress):
+            if element.tag == 'event':
+                if not parse_filter.match_event(element.get('name')):
+                    continue
+                self._total_progress_weight += sum(self._get_progress_weight(event_child) for event_child in element)
+            # conformed clips look up their timeline's format in the resources, which are always read before the library
+            self.xml_root = xml_root
+            self._collect_time_denominators((element,), self._denominators)
+        return xml_root
+
+    def _iter_document(self, progress):
+        # yields (root element, element) for the resources element and each library event once they've been fully read,
+        # events are removed from the library when the next element is requested so their subtrees can be freed
+        depth = 0
+        xml_root = library = None
+
+        with open(self.xml_file, 'rb') as xml_file:
+            for parse_event, element in ET.iterparse(ProgressReader(xml_file, progress), events=('start', 'end')):
+                if parse_event == 'start':
+                    depth += 1
+                    if xml_root is None:
+                        xml_root = element
+                    elif depth == 2 and element.tag == 'library':
+                        library = element
+                    continue
+
+                depth -= 1
+                if depth == 1 and element.tag == 'resources':
+                    yield xml_root, element
+                elif depth == 2 and element.tag == 'event' and library is not None:
+                    yield xml_root, element
+                    library.remove(element)
+                    element.clear()
+
+    def _get_timebase(self):
+        return self._calculate_timebase(self._denominators)
+
+    def _get_total_progress_weight(self):
+        return self._total_progress_weight
+
+    def _get_events(self, progress=None):
+        # reads the file again, self.xml_root already has the resources so only events are used from this pass
+        for _, element in self._iter_document(progress if progress is not None else ParseProgress()):
+            if element.tag == 'event' and self.parse_filter.match_event(element.get('name')):
+                yield element
+
+    def parse_xml(self, max_workers=None, progress=None):
+        # always serial, each event is discarded as soon as its items are created so timelines can't be built on other threads
+        return super().parse_xml(progress=progress)
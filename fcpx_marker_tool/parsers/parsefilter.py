@@ -0,0 +1,88 @@
+import fnmatch
+
+class ParseFilter:
+    """Selection predicates that parsers check before creating objects, so elements that don't match are skipped entirely"""
+
+    ITEM_TYPES = ('clip', 'timeline')
+    MARKER_TYPES = ('marker', 'chapter-marker', 'to-do')
+    DUPLICATE_POLICIES = ('keep-first', 'keep-all')
+
+    def __init__(self, event=None, project=None, item_type=None, marker_types=None, completed=None,
+                 duplicate_markers='keep-all', duplicate_tolerance=0):
+        self.event = event # event name or glob, ex: 'Day 1*'
+        self.project = project # name or glob matched against both timeline and clip names
+        self.item_type = item_type # 'clip' or 'timeline'
+        self.marker_types = marker_types # iterable containing any of MARKER_TYPES
+        self.completed = completed # True or False, to-do markers with a different completed status are skipped
+        # all patterns are matched case-insensitively
+        # 'keep-first' skips a timeline marker when one with the same name, type, and completed status was already added to the
+        # timeline within duplicate_tolerance frames of it, which happens when a clip marker is seen through overlapping or reused clips.
+        # 'keep-all' is the default so parsers return every copy as they always have, the command line opts in to 'keep-first'.
+        self.duplicate_markers = duplicate_markers
+        self.duplicate_tolerance = duplicate_tolerance # timeline frames
+
+    @property
+    def item_type(self):
+        return self._item_type
+
+    @item_type.setter
+    def item_type(self, value):
+        if value is not None and value not in self.ITEM_TYPES:
+            raise ValueError(f"item_type must be one of {self.ITEM_TYPES}")
+        self._item_type = value
+
+    @property
+    def marker_types(self):
+        return self._marker_types
+
+    @marker_types.setter
+    def marker_types(self, value):
+        if value is not None:
+            value = frozenset(value)
+            if not value.issubset(self.MARKER_TYPES):
+                raise ValueError(f"marker_types must only contain {self.MARKER_TYPES}")
+        self._marker_types = value
+
+    @property
+    def duplicate_markers(self):
+        return self._duplicate_markers
+
+    @duplicate_markers.setter
+    def duplicate_markers(self, value):
+        if value not in self.DUPLICATE_POLICIES:
+            raise ValueError(f"duplicate_markers must be one of {self.DUPLICATE_POLICIES}")
+        self._duplicate_markers = value
+
+    @property
+    def duplicate_tolerance(self):
+        return self._duplicate_tolerance
+
+    @duplicate_tolerance.setter
+    def duplicate_tolerance(self, value):
+        if not isinstance(value, int) or value < 0:
+            raise ValueError("duplicate_tolerance must be a whole number of frames, 0 or more")
+        self._duplicate_tolerance = value
+
+    @property
+    def filters_markers(self):
+        return self.marker_types is not None or self.completed is not None
+
+    def match_event(self, name):
+        return self._match_pattern(self.event, name)
+
+    def match_item(self, item_type, name):
+        if self.item_type is not None and item_type != self.item_type:
+            return False
+        return self._match_pattern(self.project, name)
+
+    def match_marker(self, marker_type, completed):
+        if self.marker_types is not None and marker_type not in self.marker_types:
+            return False
+        if self.completed is not None and marker_type == 'to-do' and completed != self.completed:
+            return False
+        return True
+
+    def _match_pattern(self, pattern, name):
+        if pattern is None:
+            return True
+        return fnmatch.fnmatchcase(str(name).lower(), pattern.lower())
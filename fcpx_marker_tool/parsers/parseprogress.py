@@ -0,0 +1,184 @@
+import threading
+import time
+import tracemalloc
+
+class ParseCancelled(Exception):
+    """Raised when a parse is cancelled or runs over its time or memory budget"""
+
+    def __init__(self, reason, partial_result=None):
+        super().__init__(reason)
+        self.reason = reason
+        self.partial_result = partial_result # ProjectFile containing the items that were fully parsed before stopping, if any
+
+class ParseProgress:
+    """Collects progress from XMLParser and FCPXParser for one run, loading a file or parsing it, and lets the run be cancelled
+    cooperatively from any thread.
+
+    start() clears everything but the callback and budgets, so one object can be used for one run after another.
+    Runs that overlap each need their own, copy() makes one with the same callback and budgets.
+    """
+
+    COUNTERS = ('events', 'projects', 'clips', 'markers')
+
+    # tracemalloc is process-wide, so it's started by the first run that traces memory and stopped when the last one finishes,
+    # unless it was already tracing before then. Runs that overlap count each other's allocations toward their memory budgets.
+    _tracing_lock = threading.Lock()
+    _tracing_runs = 0
+    _owns_tracemalloc = False
+
+    def __init__(self, callback=None, time_budget=None, memory_budget=None, report_interval=0.1):
+        self.callback = callback # called with this object at most once per report_interval while running
+        self.time_budget = time_budget # seconds
+        self.memory_budget = memory_budget # bytes, measured with tracemalloc which slows parsing down noticeably
+        self.report_interval = report_interval
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self, memory_baseline=0):
+        self.phase = None # 'loading' while the xml file is read, 'parsing' while project items are created
+        self.total_bytes = 0
+        self.bytes_read = 0
+        self.total_items = 0 # weighted number of clips and projects directly inside the events being parsed
+        self.items_done = 0
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.memory_baseline = memory_baseline # bytes held from before the run, ex: a loaded element tree, counted toward the budget
+        self.peak_memory = None
+        self.retained_memory = None # bytes of the traced memory still in use when the run finished, including memory_baseline
+        self.stop_reason = None
+        self._cancelled.clear()
+        self._started = None
+        self._finished = None
+        self._phase_started = None
+        self._last_report = 0
+        self._tracing_memory = False
+
+    def copy(self):
+        return ParseProgress(self.callback, self.time_budget, self.memory_budget, self.report_interval)
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def elapsed(self):
+        if self._started is None:
+            return 0.0
+        return (self._finished if self._finished is not None else time.monotonic()) - self._started
+
+    @property
+    def fraction(self):
+        # position within the current phase, from the input position while loading and from parsed event items afterwards
+        if self.phase == 'loading' and self.total_bytes:
+            return self.bytes_read / self.total_bytes
+        elif self.phase == 'parsing' and self.total_items:
+            return self.items_done / self.total_items
+        return 0.0
+
+    @property
+    def eta(self):
+        # estimated seconds left in the current phase, None until there's enough progress to extrapolate from
+        fraction = self.fraction
+        if not fraction or self._phase_started is None:
+            return None
+        phase_elapsed = time.monotonic() - self._phase_started
+        return phase_elapsed * (1 - fraction) / fraction
+
+    def cancel(self, reason="Parse cancelled"):
+        if not self.cancelled:
+            self.stop_reason = reason
+            self._cancelled.set()
+
+    def start(self, memory_baseline=0):
+        # begins a new run, anything left from the previous one is cleared including cancellation
+        with self._lock:
+            self._reset(memory_baseline)
+            self._started = time.monotonic()
+            if self.memory_budget is not None:
+                self._start_tracing()
+                self._tracing_memory = True
+
+    def start_phase(self, phase, total):
+        with self._lock:
+            self.phase = phase
+            self._phase_started = time.monotonic()
+            if phase == 'loading':
+                self.total_bytes = total
+            else:
+                self.total_items = total
+        self._report(force=True)
+
+    def add_bytes(self, byte_count):
+        with self._lock:
+            self.bytes_read += byte_count
+        self.check()
+
+    def add(self, items_done=0, **counts):
+        with self._lock:
+            self.items_done += items_done
+            for counter, count in counts.items():
+                self.counts[counter] += count
+        self.check()
+
+    def check(self):
+        # raises ParseCancelled once the parse has been cancelled or a budget is exceeded, called regularly by the parsers
+        if self.time_budget is not None and self.elapsed > self.time_budget:
+            self.cancel(f"Time budget of {self.time_budget}s exceeded")
+        if self._tracing_memory:
+            current_memory, peak_memory = tracemalloc.get_traced_memory()
+            current_memory, self.peak_memory = self.memory_baseline + current_memory, self.memory_baseline + peak_memory
+            if current_memory > self.memory_budget:
+                self.cancel(f"Memory budget of {self.memory_budget} bytes exceeded")
+
+        if self.cancelled:
+            raise ParseCancelled(self.stop_reason)
+
+        self._report()
+
+    def finish(self):
+        # ends the run and stops memory tracing if it was started for it, safe to call more than once
+        with self._lock:
+            if self._finished is None and self._started is not None:
+                self._finished = time.monotonic()
+            if self._tracing_memory:
+                current_memory, peak_memory = tracemalloc.get_traced_memory()
+                self.peak_memory, self.retained_memory = self.memory_baseline + peak_memory, self.memory_baseline + current_memory
+                self._tracing_memory = False
+                self._stop_tracing()
+        self._report(force=True)
+
+    @classmethod
+    def _start_tracing(cls):
+        with cls._tracing_lock:
+            if cls._tracing_runs == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                ParseProgress._owns_tracemalloc = True
+            ParseProgress._tracing_runs += 1
+
+    @classmethod
+    def _stop_tracing(cls):
+        with cls._tracing_lock:
+            ParseProgress._tracing_runs -= 1
+            if cls._tracing_runs == 0 and cls._owns_tracemalloc:
+                tracemalloc.stop()
+                ParseProgress._owns_tracemalloc = False
+
+    def _report(self, force=False):
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_report >= self.report_interval:
+            self._last_report = now
+            self.callback(self)
+
+class ProgressReader:
+    """File object wrapper that reports how many bytes have been read, so loading can be tracked and cancelled"""
+
+    def __init__(self, file, progress):
+        self.file = file
+        self.progress = progress
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.progress.add_bytes(len(data))
+        return data
@@ -1,17 +1,46 @@
+import os
 import xml.etree.ElementTree as ET
+from typing import NamedTuple
 
-from fcpx_marker_tool.parsers.fcpxparser import FCPXParser
+from fcpx_marker_tool.parsers.fcpxparser import FCPXParser, StreamingFCPXParser
 from fcpx_marker_tool.parsers.fcp7parser import FCP7Parser
+from fcpx_marker_tool.parsers.parseprogress import ProgressReader, ParseCancelled
+
+class SniffedXML(NamedTuple):
+    root_tag: str
+    version: str # None if the root element has no version attribute
+
+class MemoryEstimate(NamedTuple):
+    file_size: int # bytes
+    tree_peak: int # estimated peak bytes when the whole document is loaded before parsing
+    streaming_peak: int # estimated peak bytes when it's parsed one event at a time
 
 class XMLParser:
 
+    SNIFF_CHUNK_SIZE = 4096
+
     parser_types = {
         "fcpxml": FCPXParser,
         "xmeml": FCP7Parser
     }
 
-    def __init__(self, xml_file):
+    # checked before parser_types so specific document versions can be handled differently, ex: {("fcpxml", "1.5"): CustomParser}
+    version_parser_types = {}
+
+    # used instead of parser_types when loading the whole document would go over the progress memory budget,
+    # these take the file path instead of a root element
+    streaming_parser_types = {
+        "fcpxml": StreamingFCPXParser
+    }
+
+    # bytes of memory per byte of xml, measured with tracemalloc on FCPXML files. An ElementTree takes about 6, and the parsed
+    # project items took between 3 and 12 depending on how many clips share the same markers, so the higher end is used
+    TREE_MEMORY_FACTOR = 6
+    PARSED_MEMORY_FACTOR = 12
+
+    def __init__(self, xml_file, progress=None):
         self.xml_file = xml_file
+        self.progress = progress # optional ParseProgress, reports bytes read while loading and is passed on to the parser for its settings
 
     @property
     def xml_file(self):
@@ -24,27 +53,99 @@ class XMLParser:
         self._xml_file = validated_xml_file
     
     def _get_xml_root(self):
-        tree = ET.parse(self.xml_file)
+        if self.progress is None:
+            tree = ET.parse(self.xml_file)
+        else:
+            # loading is a run of its own, so memory tracing started for it stops here whether or not the tree is ever parsed
+            self.progress.start()
+            try:
+                self.progress.start_phase('loading', os.path.getsize(self.xml_file))
+                with open(self.xml_file, 'rb') as xml_file:
+                    tree = ET.parse(ProgressReader(xml_file, self.progress))
+            finally:
+                self.progress.finish()
         xml_root = tree.getroot()
         return xml_root
 
-    def _choose_parser(self, xml_root):
-        xml_type = xml_root.tag
+    @classmethod
+    def register_parser(cls, root_tag, parser_type, version=None):
+        if version is None:
+            cls.parser_types[root_tag] = parser_type
+        else:
+            cls.version_parser_types[(root_tag, version)] = parser_type
+
+    def sniff(self):
+        # reads only as far as the root element's start tag, so files can be accepted or rejected without parsing the whole document
+        pull_parser = ET.XMLPullParser(events=('start',))
+
+        with open(self.xml_file, 'rb') as xml_file:
+            while chunk := xml_file.read(self.SNIFF_CHUNK_SIZE):
+                pull_parser.feed(chunk)
+                for _, root_element in pull_parser.read_events():
+                    return SniffedXML(root_element.tag, root_element.get('version'))
+
+        # raises ParseError for empty or truncated files
+        pull_parser.close()
+        raise ET.ParseError("no root element found")
 
-        if xml_type not in self.parser_types:
+    def can_parse(self):
+        try:
+            self._choose_parser(self.sniff())
+        except (OSError, ValueError, ET.ParseError):
+            return False
+        return True
+
+    def _choose_parser(self, sniffed_xml):
+        xml_type, version = sniffed_xml
+        parser_type = self.version_parser_types.get((xml_type, version), self.parser_types.get(xml_type))
+
+        if parser_type is None:
             raise ValueError(f"XML type '{xml_type}' not recognized")
-        parser_type = self.parser_types[xml_type]
 
         return parser_type
 
+    def estimate_memory(self):
+        file_size = os.path.getsize(self.xml_file)
+        parsed_memory = file_size * self.PARSED_MEMORY_FACTOR
+        return MemoryEstimate(file_size, file_size * self.TREE_MEMORY_FACTOR + parsed_memory, parsed_memory)
+
+    def _choose_load_strategy(self, sniffed_xml, parser_type):
+        # the whole document is loaded unless that's expected to go over the memory budget, in which case a streaming version of
+        # parser_type is used if there is one. ParseCancelled is raised before reading anything if neither is expected to fit
+        memory_budget = self.progress.memory_budget if self.progress is not None else None
+        if memory_budget is None:
+            return 'tree'
+
+        memory_estimate = self.estimate_memory()
+        if memory_estimate.tree_peak <= memory_budget:
+            return 'tree'
+
+        budget_mb = memory_budget / 1024 / 1024
+        streaming_parser_type = self.streaming_parser_types.get(sniffed_xml.root_tag)
+        if streaming_parser_type is None or not issubclass(streaming_parser_type, parser_type):
+            raise ParseCancelled(f"Memory budget of {budget_mb:.0f} MB is below the estimated "
+                                 f"{memory_estimate.tree_peak / 1024 / 1024:.0f} MB needed to load this file")
+        if memory_estimate.streaming_peak > memory_budget:
+            raise ParseCancelled(f"Memory budget of {budget_mb:.0f} MB is below the estimated "
+                                 f"{memory_estimate.streaming_peak / 1024 / 1024:.0f} MB needed to parse this file one event at a time")
+
+        return 'streaming'
+
     def _fcpx_bundle_check(self, xml_file):
         if xml_file.suffix == '.fcpxmld' and (xml_file / 'Info.fcpxml').exists():
             xml_file = str(xml_file / 'Info.fcpxml')
 
         return xml_file
 
-    def create_parser(self):
+    def create_parser(self, parse_filter=None):
+        sniffed_xml = self.sniff()
+        parser_type = self._choose_parser(sniffed_xml)
+        # the parser's load_strategy attribute records the choice, and is copied to every ProjectFile it returns
+        load_strategy = self._choose_load_strategy(sniffed_xml, parser_type)
+
+        if load_strategy == 'streaming':
+            return self.streaming_parser_types[sniffed_xml.root_tag](self.xml_file, parse_filter, self.progress)
+
         xml_root = self._get_xml_root()
-        parser_type = self._choose_parser(xml_root)
-        parser = parser_type(xml_root)
-        return parser
\ No newline at end of file
+        parser = parser_type(xml_root, parse_filter, self.progress)
+        return parser
@@ -7,6 +7,7 @@ setup(
     author='Arthur Wilton',
     url='https://github.com/artwilton/fcpx-marker-tool',
     install_requires=['timecode'],
+    extras_require={'numpy': ['numpy']},
     packages=find_packages(exclude=('tests')),
     entry_points={
         'console_scripts' : [
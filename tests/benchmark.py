@@ -0,0 +1,248 @@
+"""Benchmarks for parsing and export, run from the repository root with: python tests/benchmark.py [name ...] [--scale N]
+
+Every benchmark builds its own synthetic library with samplelibrary, so results can be compared between commits on one machine.
+"""
+import argparse
+import gc
+import xml.etree.ElementTree as ET
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from fcpx_marker_tool.common import markerstream
+from fcpx_marker_tool.common.database import MarkerDatabase
+from fcpx_marker_tool.common.filemanagement import MarkerRenderer, OutputFormatting
+from fcpx_marker_tool.common.projectclasses import Marker, ProjectFile, Timeline
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+from fcpx_marker_tool.parsers.parsefilter import ParseFilter
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+def best_time(function, repeat=3):
+    # returns (best time in seconds, result of the last call), garbage collection is paused while timing to cut noise
+    best, result = None, None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        gc.disable()
+        try:
+            start_time = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - start_time
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def peak_memory(function):
+    # returns peak bytes traced while function runs, measured separately from timing since tracemalloc slows everything down
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def report(label, seconds, detail=""):
+    print(f"  {label:<40} {seconds:8.3f}s  {detail}")
+
+def benchmark_threads(directory, scale):
+    # parse_xml throughput with and without a thread pool for timelines
+    library_path = samplelibrary.write_library(directory / 'threads.fcpxml', samplelibrary.create_library(events=10 * scale, projects=10, clips=60))
+    parser = XMLParser(library_path).create_parser()
+
+    for max_workers in (None, 1, 2, 4, 8):
+        seconds, project_file = best_time(lambda: parser.parse_xml(max_workers=max_workers))
+        markers = sum(len(item.markers) for item in project_file.items)
+        report(f"max_workers={max_workers}", seconds, f"{markers / seconds:,.0f} markers/s")
+
+def benchmark_database(directory, scale):
+    # MarkerDatabase import speed for a new database, then re-importing the same file over its existing rows and indexes
+    library_path = samplelibrary.write_library(directory / 'database.fcpxml', samplelibrary.create_library(events=10 * scale, projects=10, clips=60))
+    project_file = XMLParser(library_path).create_parser().parse_xml()
+    database_path = directory / 'database.sqlite'
+
+    for label in ("first import", "re-import"):
+        with MarkerDatabase(database_path) as marker_database:
+            seconds, row_counts = best_time(lambda: marker_database.import_project_files([project_file]), repeat=1)
+        rows = sum(row_counts.values())
+        report(label, seconds, f"{rows:,} rows, {rows / seconds:,.0f} rows/s")
+
+def benchmark_filters(directory, scale):
+    # parse_xml time with ParseFilters of decreasing selectivity, filtered events and items are skipped before anything is built
+    library_path = samplelibrary.write_library(directory / 'filters.fcpxml', samplelibrary.create_library(events=10 * scale, projects=10, clips=60))
+    parse_filters = {
+        "no filter": ParseFilter(),
+        "event 'Event 3'": ParseFilter(event='Event 3'),
+        "event 'Event 3', project 'Project 2'": ParseFilter(event='Event 3', project='Project 2'),
+        "clips only": ParseFilter(item_type='clip'),
+        "incomplete to-dos only": ParseFilter(marker_types=['to-do'], completed=False)
+    }
+
+    for label, parse_filter in parse_filters.items():
+        parser = XMLParser(library_path).create_parser(parse_filter)
+        seconds, project_file = best_time(parser.parse_xml)
+        report(label, seconds, f"{sum(len(item.markers) for item in project_file.items):,} markers")
+
+def benchmark_render(directory, scale):
+    # every formatting option rendered in one MarkerRenderer pass, against formatting each marker with OutputFormatting per option
+    rng = random.Random(1)
+    frame_rates = [(24000, 1001), (24, 1), (25, 1), (30000, 1001), (30, 1), (50, 1), (60000, 1001), (60, 1)]
+    markers = []
+    for index in range(20000 * scale):
+        frame_rate = rng.choice(frame_rates)
+        start = rng.randint(0, 10 * 60 * 60 * 60) * frame_rate[1]
+        timecode_info = TimecodeInfo(frame_rate, start, frame_rate[1], non_drop_frame=rng.random() < 0.5, timebase=frame_rate[0])
+        markers.append(Marker(f"Marker {index}", "marker", timecode_info))
+
+    seconds, _ = best_time(lambda: MarkerRenderer(OutputFormatting.FORMATTING_OPTIONS).render(markers))
+    report("MarkerRenderer, all formats", seconds, f"{len(markers):,} markers")
+    seconds, _ = best_time(lambda: {formatting_option: [OutputFormatting(marker, formatting_option).formatted for marker in markers]
+                                    for formatting_option in OutputFormatting.FORMATTING_OPTIONS})
+    report("OutputFormatting per marker, all formats", seconds, f"{len(markers):,} markers")
+
+def benchmark_sniff(directory, scale):
+    # accepting or rejecting a mixed directory of .xml files by sniffing the root element, against fully parsing each file first
+    sweep_directory = directory / 'sniff'
+    sweep_directory.mkdir()
+    library_text = samplelibrary.create_library(events=2 * scale)
+    unrelated_text = '<export>' + ''.join(f'<row id="{row}" value="{row * 7}"/>' for row in range(100000 * scale)) + '</export>'
+    for index in range(5):
+        samplelibrary.write_library(sweep_directory / f'library{index}.fcpxml', library_text)
+        samplelibrary.write_library(sweep_directory / f'export{index}.xml', unrelated_text)
+        samplelibrary.write_library(sweep_directory / f'sequence{index}.xml', '<xmeml version="5"><sequence><name>Sequence</name></sequence></xmeml>')
+        samplelibrary.write_library(sweep_directory / f'empty{index}.xml', '')
+    paths = sorted(sweep_directory.iterdir())
+
+    def full_parse(path):
+        try:
+            return ET.parse(path).getroot().tag in XMLParser.parser_types
+        except ET.ParseError:
+            return False
+
+    seconds, accepted = best_time(lambda: [path for path in paths if XMLParser(path).can_parse()])
+    report("can_parse", seconds, f"{len(accepted)} of {len(paths)} files accepted")
+    seconds, accepted = best_time(lambda: [path for path in paths if full_parse(path)])
+    report("ET.parse, then root tag", seconds, f"{len(accepted)} of {len(paths)} files accepted")
+
+def benchmark_merge(directory, scale):
+    # merging every timeline of a library end to end and rendering it, lazily with merge_markers against building and sorting one list
+    library_path = samplelibrary.write_library(directory / 'merge.fcpxml', samplelibrary.create_library(events=4 * scale, projects=10, clips=150, markers=8))
+    timelines = XMLParser(library_path).create_parser().parse_xml().get_timelines()
+    sources, offset = [], 0
+    for timeline in timelines:
+        timecode_info = timeline.timecode_info
+        sources.append(markerstream.MarkerSource(timeline, offset - timecode_info.as_fraction(timecode_info.start)))
+        offset += timecode_info.as_fraction(timecode_info.duration)
+    marker_renderer = MarkerRenderer(["DVD Studio Pro"])
+
+    def merged():
+        # deque with maxlen=0 consumes the lines without keeping them, like writing them to an OutputFile
+        deque(marker_renderer.iter_lines(markerstream.merge_markers(sources)), maxlen=0)
+
+    def materialised():
+        marker_renderer.render(list(markerstream.merge_markers(sources)))
+
+    markers = sum(len(timeline.markers) for timeline in timelines)
+    for label, function in (("merge_markers, iter_lines", merged), ("combined list, sort, render", materialised)):
+        seconds, _ = best_time(function)
+        report(label, seconds, f"{len(sources)} timelines, {markers:,} markers, {peak_memory(function) / 1024 / 1024:.1f} MB peak")
+
+class UncachedMarkers(dict):
+    # stands in for FCPXParser._marker_cache so every clip builds its own markers, as before the cache
+    def __setitem__(self, key, value):
+        pass
+
+def benchmark_marker_cache(directory, scale):
+    # parse_xml on a library where every asset's markers are repeated across browser clips and timelines, with and without the cache
+    library_path = samplelibrary.write_library(directory / 'reused.fcpxml', samplelibrary.create_reused_library(events=4 * scale))
+
+    for label, marker_cache_type in (("marker cache", dict), ("no marker cache", UncachedMarkers)):
+        parser = XMLParser(library_path).create_parser()
+        def parse():
+            # the cache is emptied before every run so each one parses the library from scratch
+            parser._marker_cache = marker_cache_type()
+            return parser.parse_xml()
+        seconds, project_file = best_time(parse)
+        markers = sum(len(item.markers) for item in project_file.items)
+        report(label, seconds, f"{markers:,} markers, {parser.marker_cache_stats.hit_rate:.0%} hit rate")
+
+def benchmark_resource_usage(directory, scale):
+    # cost of filling in ProjectFile.resource_usage as items are added, and finding every file's clips through it or by scanning items
+    library_path = samplelibrary.write_library(directory / 'usage.fcpxml', samplelibrary.create_reused_library(events=4 * scale))
+    parsed_project_file = XMLParser(library_path).create_parser().parse_xml()
+    file_paths = {resource.file_path for resource in parsed_project_file.resources}
+
+    def add_items():
+        project_file = ProjectFile(parsed_project_file.name, parsed_project_file.file_path, timebase=parsed_project_file.timebase)
+        for resource in parsed_project_file.resources:
+            project_file.add_resource(resource)
+        for item in parsed_project_file.items:
+            project_file.add_item(item)
+        return project_file
+
+    def scan_items(file_path):
+        resource_ids = {resource.id for resource in parsed_project_file.resources if resource.file_path == file_path}
+        clips = []
+        for item in parsed_project_file.items:
+            for clip in (item.clips if isinstance(item, Timeline) else [item]):
+                if clip.resource_id in resource_ids:
+                    clips.append(clip)
+        return clips
+
+    parse_seconds, _ = best_time(XMLParser(library_path).create_parser().parse_xml)
+    report("parse_xml", parse_seconds, f"{len(parsed_project_file.items):,} items")
+    seconds, project_file = best_time(add_items)
+    report("add_item, building resource_usage", seconds, f"{seconds / parse_seconds:.1%} of parse_xml")
+    seconds, _ = best_time(lambda: [project_file.get_file_usage(file_path) for file_path in file_paths])
+    report("get_file_usage", seconds, f"{len(file_paths)} files, {seconds / len(file_paths) * 1000000:,.1f} µs per file")
+    seconds, _ = best_time(lambda: [scan_items(file_path) for file_path in file_paths])
+    report("scanning every item", seconds, f"{len(file_paths)} files, {seconds / len(file_paths) * 1000000:,.1f} µs per file")
+
+def benchmark_dedup(directory, scale):
+    # parse_xml on timelines where connected clips repeat every clip marker, with each duplicate_markers policy
+    library_path = samplelibrary.write_library(directory / 'overlapping.fcpxml', samplelibrary.create_overlapping_library(projects=20 * scale))
+    parse_filters = {
+        "keep-all": ParseFilter(duplicate_markers='keep-all'),
+        "keep-first": ParseFilter(duplicate_markers='keep-first'),
+        "keep-first, 1 frame tolerance": ParseFilter(duplicate_markers='keep-first', duplicate_tolerance=1)
+    }
+
+    for label, parse_filter in parse_filters.items():
+        parser = XMLParser(library_path).create_parser(parse_filter)
+        seconds, project_file = best_time(parser.parse_xml)
+        report(label, seconds, f"{sum(len(timeline.markers) for timeline in project_file.get_timelines()):,} timeline markers")
+
+BENCHMARKS = {
+    "database": benchmark_database,
+    "dedup": benchmark_dedup,
+    "filters": benchmark_filters,
+    "marker_cache": benchmark_marker_cache,
+    "merge": benchmark_merge,
+    "render": benchmark_render,
+    "resource_usage": benchmark_resource_usage,
+    "sniff": benchmark_sniff,
+    "threads": benchmark_threads
+}
+
+def main(argv=None):
+    argument_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argument_parser.add_argument('names', nargs='*', metavar='name', help=f"benchmarks to run, all of them by default: {', '.join(BENCHMARKS)}")
+    argument_parser.add_argument('--scale', type=int, default=1, help="multiplies the size of every synthetic library")
+    args = argument_parser.parse_args(argv)
+    for name in args.names:
+        if name not in BENCHMARKS:
+            argument_parser.error(f"unknown benchmark '{name}'")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.names or BENCHMARKS:
+            print(name)
+            BENCHMARKS[name](Path(directory), args.scale)
+
+if __name__ == '__main__':
+    main()
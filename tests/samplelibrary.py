@@ -0,0 +1,190 @@
+import random
+
+# synthetic FCPXML libraries for the tests and benchmarks, every value comes from a seeded random.Random so output is repeatable
+
+HEADER = ['<?xml version="1.0" encoding="UTF-8"?>', '<!DOCTYPE fcpxml>', '<fcpxml version="1.10">', '<resources>',
+          '<format id="r1" name="FFVideoFormat1080p2997" frameDuration="1001/30000s" width="1920" height="1080"/>',
+          '<format id="r2" name="FFVideoFormat1080p24" frameDuration="100/2400s" width="1920" height="1080"/>']
+
+def create_library(events=3, browser_clips=5, projects=3, clips=20, markers=4, assets=10, seed=1):
+    # mixes 29.97 and 24 fps media with connected clips, gaps, auditions, and conformed clips, markers are random per clip
+    rng = random.Random(seed)
+    lines = list(HEADER)
+    for asset in range(assets):
+        frame_format = 'r2' if asset % 3 == 0 else 'r1'
+        lines.append(f'<asset id="a{asset}" name="Asset {asset}" start="0s" duration="{rng.randint(100, 10000) * 100}/2400s" hasVideo="1" '
+                     f'format="{frame_format}"><media-rep kind="original-media" src="file:///Volumes/Media/clip{asset}.mov"/></asset>')
+    lines.append('</resources>')
+    lines.append('<library location="file:///Users/editor/Movies/Sample.fcpbundle/">')
+
+    asset_numbers = iter(range(10 ** 9))
+    next_asset = lambda: next(asset_numbers) % assets
+
+    for event in range(events):
+        lines.append(f'<event name="Event {event}">')
+        for browser_clip in range(browser_clips):
+            lines.append(f'<asset-clip ref="a{next_asset()}" name="Browser {browser_clip}" duration="12000/2400s" format="r1" tcFormat="NDF">'
+                         f'{_random_markers(rng, markers)}</asset-clip>')
+
+        for project in range(projects):
+            lines.append(f'<project name="Project {project}"><sequence format="r1" duration="{clips * 300 * 1001}/30000s" tcStart="0s" '
+                         f'tcFormat="NDF"><spine>')
+            for clip in range(clips):
+                lines.append(_spine_clip(rng, clip, clip * 300, next_asset(), next_asset, markers))
+            lines.append('</spine></sequence></project>')
+        lines.append('</event>')
+
+    lines.append('</library></fcpxml>')
+    return '\n'.join(lines)
+
+def create_reused_library(assets=50, events=4, projects=25, clips=120, markers=8, seed=2):
+    # every asset has one fixed set of markers, repeated on its browser clip and on every timeline clip that uses it
+    rng = random.Random(seed)
+    lines = HEADER[:5]
+    asset_markers = []
+    for asset in range(assets):
+        lines.append(f'<asset id="a{asset}" name="Asset {asset}" start="0s" duration="{rng.randint(1000, 10000) * 1001}/30000s" hasVideo="1" '
+                     f'format="r1"><media-rep kind="original-media" src="file:///Volumes/Media/clip{asset}.mov"/></asset>')
+        asset_markers.append(_random_markers(rng, markers, max_frame=900))
+    lines.append('</resources>')
+    lines.append('<library location="file:///Users/editor/Movies/Reused.fcpbundle/">')
+
+    for event in range(events):
+        lines.append(f'<event name="Event {event}">')
+        for asset in range(assets):
+            lines.append(f'<asset-clip ref="a{asset}" name="Asset {asset}" duration="{9000 * 1001}/30000s" tcFormat="NDF">{asset_markers[asset]}</asset-clip>')
+        for project in range(projects):
+            lines.append(f'<project name="Project {event}.{project}"><sequence format="r1" duration="{clips * 300 * 1001}/30000s" '
+                         f'tcStart="0s" tcFormat="NDF"><spine>')
+            for clip in range(clips):
+                asset = rng.randrange(assets)
+                lines.append(f'<asset-clip ref="a{asset}" offset="{clip * 300 * 1001}/30000s" name="Asset {asset}" '
+                             f'start="{rng.randint(0, 600) * 1001}/30000s" duration="{300 * 1001}/30000s" tcFormat="NDF">{asset_markers[asset]}</asset-clip>')
+            lines.append('</spine></sequence></project>')
+        lines.append('</event>')
+
+    lines.append('</library></fcpxml>')
+    return '\n'.join(lines)
+
+def create_overlapping_library(projects=20, clips=50, lanes=4, markers=40):
+    # every primary clip has connected clips of the same media over the same range, so each clip marker is seen 1 + lanes times.
+    # Lanes above lanes // 2 start one frame late, so their copies are one frame off
+    lines = HEADER[:5]
+    lines.append('<asset id="a0" name="Asset 0" start="0s" duration="90090000/30000s" hasVideo="1" format="r1">'
+                 '<media-rep kind="original-media" src="file:///Volumes/Media/clip0.mov"/></asset>')
+    lines.append('</resources>')
+    lines.append('<library location="file:///Users/editor/Movies/Overlapping.fcpbundle/">')
+    lines.append('<event name="Event 0">')
+
+    clip_frames = 1200
+    clip_markers = ''.join(f'<marker start="{(marker * 30 + 7) * 1001}/30000s" duration="1001/30000s" value="Marker {marker % 10}"/>'
+                           for marker in range(markers))
+    for project in range(projects):
+        lines.append(f'<project name="Overlapping {project}"><sequence format="r1" duration="{clips * clip_frames * 1001}/30000s" '
+                     f'tcStart="0s" tcFormat="NDF"><spine>')
+        for clip in range(clips):
+            connected_clips = ''.join(
+                f'<asset-clip ref="a0" lane="{lane}" offset="{1001 if lane > lanes // 2 else 0}/30000s" name="Connected {lane}" start="0s" '
+                f'duration="{(clip_frames - 1) * 1001}/30000s" tcFormat="NDF">{clip_markers}</asset-clip>'
+                for lane in range(1, lanes + 1)
+            )
+            lines.append(f'<asset-clip ref="a0" offset="{clip * clip_frames * 1001}/30000s" name="Clip {clip}" start="0s" '
+                         f'duration="{clip_frames * 1001}/30000s" tcFormat="NDF">{clip_markers}{connected_clips}</asset-clip>')
+        lines.append('</spine></sequence></project>')
+
+    lines.append('</event>')
+    lines.append('</library></fcpxml>')
+    return '\n'.join(lines)
+
+def create_conformed_library(tc_start_hours=0, clips=12, markers=6, seed=3):
+    # one timeline per video rate with clips conformed from every source rate FCPX conforms to it, markers on and between frames,
+    # and connected audio clips timed in 44.1, 48, and 96 kHz samples. Spine offsets start at tc_start_hours like they do in FCPX
+    rng = random.Random(seed)
+    frame_durations = {'r1': (1001, 30000), 'r2': (100, 2400), 'r3': (1001, 24000), 'r4': (100, 2500), 'r5': (100, 3000)}
+    source_frame_rates = {'r2': '24', 'r3': '23.98', 'r4': '25', 'r5': '30'}
+    timelines = [('r3', 'NDF', ['r2', 'r4']), ('r2', 'NDF', ['r3', 'r4']), ('r4', 'NDF', ['r3', 'r2']), ('r1', 'DF', ['r5'])]
+    sample_rates = (44100, 48000, 96000)
+
+    lines = HEADER[:4] + [f'<format id="{format_id}" frameDuration="{numerator}/{denominator}s" width="1920" height="1080"/>'
+                          for format_id, (numerator, denominator) in frame_durations.items()]
+    for format_id in frame_durations:
+        lines.append(f'<asset id="v{format_id}" name="Video {format_id}" start="0s" duration="36000s" hasVideo="1" format="{format_id}">'
+                     f'<media-rep kind="original-media" src="file:///Volumes/Media/{format_id}.mov"/></asset>')
+    for sample_rate in sample_rates:
+        lines.append(f'<asset id="s{sample_rate}" name="Audio {sample_rate}" start="0s" duration="36000s" hasAudio="1">'
+                     f'<media-rep kind="original-media" src="file:///Volumes/Media/audio{sample_rate}.wav"/></asset>')
+    lines.append('</resources>')
+    lines.append('<library location="file:///Users/editor/Movies/Conformed.fcpbundle/">')
+    lines.append('<event name="Event 0">')
+
+    clip_frames = 240
+    for format_id, tc_format, source_format_ids in timelines:
+        numerator, denominator = frame_durations[format_id]
+        frames_per_hour = 107892 if tc_format == 'DF' else 3600 * round(denominator / numerator)
+        tc_start = tc_start_hours * frames_per_hour
+        lines.append(f'<project name="Timeline {format_id}"><sequence format="{format_id}" duration="{clips * clip_frames * numerator}/{denominator}s" '
+                     f'tcStart="{tc_start * numerator}/{denominator}s" tcFormat="{tc_format}"><spine>')
+        for clip in range(clips):
+            offset = f'{(tc_start + clip * clip_frames) * numerator}/{denominator}s'
+            duration = f'{clip_frames * numerator}/{denominator}s'
+            source_format_id = ([format_id] + source_format_ids)[clip % (len(source_format_ids) + 1)]
+            source_numerator, source_denominator = frame_durations[source_format_id]
+            start_frame = rng.randint(0, 100)
+            conform_rate = f'<conform-rate srcFrameRate="{source_frame_rates[source_format_id]}"/>' if source_format_id != format_id else ''
+
+            sample_rate = sample_rates[clip % len(sample_rates)]
+            audio_markers = ''.join(f'<marker start="{rng.randint(0, 10 * sample_rate)}/{sample_rate}s" duration="{sample_rate // 10}/{sample_rate}s" '
+                                    f'value="Audio {marker}"/>' for marker in range(markers))
+            audio_clip = (f'<asset-clip ref="s{sample_rate}" lane="-1" offset="{(start_frame + 12) * source_numerator}/{source_denominator}s" '
+                          f'name="Audio {clip}" start="{rng.randint(0, 10 * sample_rate)}/{sample_rate}s" duration="{5 * sample_rate}/{sample_rate}s">'
+                          f'{audio_markers}</asset-clip>')
+            video_markers = ''.join(f'<marker start="{(start_frame + rng.randint(-10, clip_frames + 10)) * source_numerator * 4 + source_numerator * rng.randint(0, 3)}'
+                                    f'/{source_denominator * 4}s" duration="{source_numerator}/{source_denominator}s" value="Marker {marker}"/>'
+                                    for marker in range(markers))
+            lines.append(f'<asset-clip ref="v{source_format_id}" offset="{offset}" name="Clip {clip}" start="{start_frame * source_numerator}/{source_denominator}s" '
+                         f'duration="{duration}" format="{source_format_id}" tcFormat="NDF">{conform_rate}{video_markers}{audio_clip}</asset-clip>')
+        lines.append('</spine></sequence></project>')
+
+    lines.append('</event>')
+    lines.append('</library></fcpxml>')
+    return '\n'.join(lines)
+
+def write_library(path, library_text):
+    path.write_text(library_text, encoding='utf-8')
+    return path
+
+def _spine_clip(rng, clip, offset, asset, next_asset, markers):
+    start = rng.randint(0, 50)
+    connected_clip = ''
+    if clip % 3 == 0:
+        connected_clip = (f'<asset-clip ref="a{next_asset()}" lane="1" offset="{(start + 10) * 1001}/30000s" name="Connected {clip}" '
+                          f'start="{start * 1001}/30000s" duration="{100 * 1001}/30000s" tcFormat="NDF">{_random_markers(rng, markers)}</asset-clip>')
+
+    if clip % 7 == 5:
+        return (f'<gap name="Gap" offset="{offset * 1001}/30000s" start="{start * 1001}/30000s" duration="{300 * 1001}/30000s">{connected_clip}'
+                f'<marker start="{(start + 5) * 1001}/30000s" duration="1001/30000s" value="Gap marker"/></gap>')
+    elif clip % 7 == 6:
+        return (f'<audition offset="{offset * 1001}/30000s"><asset-clip ref="a{asset}" name="Audition {clip}" start="{start * 1001}/30000s" '
+                f'duration="{300 * 1001}/30000s" tcFormat="NDF">{_random_markers(rng, markers)}</asset-clip>'
+                f'<asset-clip ref="a{asset}" name="Audition alternate" start="0s" duration="{300 * 1001}/30000s"/></audition>')
+    elif clip % 7 == 4 and asset % 3 == 0:
+        return (f'<asset-clip ref="a{asset}" offset="{offset * 1001}/30000s" name="Conformed {clip}" start="{start * 100}/2400s" '
+                f'duration="{300 * 1001}/30000s" format="r2" tcFormat="NDF"><conform-rate srcFrameRate="24"/>'
+                f'{_random_markers(rng, markers, frame_duration=(100, 2400))}{connected_clip}</asset-clip>')
+    return (f'<asset-clip ref="a{asset}" offset="{offset * 1001}/30000s" name="Clip {clip}" start="{start * 1001}/30000s" '
+            f'duration="{300 * 1001}/30000s" tcFormat="NDF">{_random_markers(rng, markers)}{connected_clip}</asset-clip>')
+
+def _random_markers(rng, count, frame_duration=(1001, 30000), max_frame=300):
+    numerator, denominator = frame_duration
+    markers = []
+    for index in range(count):
+        start = f'{rng.randint(0, max_frame) * numerator}/{denominator}s'
+        duration = f'{numerator}/{denominator}s'
+        marker_type = rng.choice(['marker', 'chapter-marker', 'to-do'])
+        if marker_type == 'to-do':
+            markers.append(f'<marker start="{start}" duration="{duration}" value="Todo VFX {index}" completed="{rng.randint(0, 1)}"/>')
+        elif marker_type == 'chapter-marker':
+            markers.append(f'<chapter-marker start="{start}" duration="{duration}" value="Chapter music cue {index}" posterOffset="11/30s"/>')
+        else:
+            markers.append(f'<marker start="{start}" duration="{duration}" value="Marker {index}"/>')
+    return ''.join(markers)
@@ -0,0 +1,37 @@
+import unittest
+from unittest import mock
+from fcpx_marker_tool.common.projectclasses import Clip, Marker, ProjectFile, Timeline
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+from fcpx_marker_tool.interface.cli import MenuBasedCLI
+
+def create_item(item_type, name, marker_count):
+    timecode_info = TimecodeInfo((25, 1), (0, 1), (marker_count + 1, 1), timebase=25)
+    if item_type is Timeline:
+        item = Timeline(name, timecode_info, "Library/Event")
+    else:
+        item = Clip(name, "asset-clip", timecode_info, "Library/Event")
+    for index in range(marker_count):
+        item.add_marker(Marker(f"Marker {index}", "marker", TimecodeInfo((25, 1), (index, 1), (1, 25), timebase=25)))
+    return item
+
+class LikelyMarkerSourcesTest(unittest.TestCase):
+
+    def likely_names(self, items, limit=10):
+        project_file = ProjectFile("Library", "file:///Users/editor/Movies/Library.fcpbundle/", timebase=25)
+        for item in items:
+            project_file.add_item(item)
+        with mock.patch.object(MenuBasedCLI, 'BACKGROUND_RENDER_MARKER_LIMIT', limit):
+            return [item.name for item in MenuBasedCLI()._get_likely_marker_sources(project_file)]
+
+    def test_timelines_first_within_limit(self):
+        items = [create_item(Clip, "Clip A", 2), create_item(Timeline, "Timeline A", 4), create_item(Timeline, "Empty", 0),
+                 create_item(Timeline, "Timeline B", 4)]
+        self.assertEqual(self.likely_names(items), ["Timeline A", "Timeline B", "Clip A"])
+
+    def test_items_that_do_not_fit_are_skipped(self):
+        items = [create_item(Timeline, "Oversized", 11), create_item(Timeline, "Timeline A", 6), create_item(Timeline, "Timeline B", 6),
+                 create_item(Clip, "Clip A", 4), create_item(Clip, "Clip B", 1)]
+        self.assertEqual(self.likely_names(items), ["Timeline A", "Clip A"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+from fractions import Fraction
+from pathlib import Path
+from fcpx_marker_tool.common.database import MarkerDatabase
+from fcpx_marker_tool.common.projectclasses import Marker, ProjectFile, Timeline
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+class MarkerDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = Path(temporary_directory.name)
+        self.marker_database = MarkerDatabase(self.directory / 'markers.sqlite')
+        self.addCleanup(self.marker_database.close)
+
+    def parse(self, library_text, name='library.fcpxml'):
+        library_path = samplelibrary.write_library(self.directory / name, library_text)
+        return XMLParser(library_path).create_parser().parse_xml()
+
+    def count_rows(self, table):
+        return self.marker_database.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def import_marker_names(self, marker_names, library_name="Library"):
+        # one timeline with a marker per name, one second apart
+        project_file = ProjectFile(library_name, f"file:///Users/editor/Movies/{library_name}.fcpbundle/", timebase=25)
+        timeline = Timeline("Timeline", TimecodeInfo((25, 1), (0, 1), (len(marker_names), 1), timebase=25), library_name)
+        for index, marker_name in enumerate(marker_names):
+            timeline.add_marker(Marker(marker_name, "marker", TimecodeInfo((25, 1), (index, 1), (1, 25), timebase=25)))
+        project_file.add_item(timeline)
+        self.marker_database.import_project_files([project_file])
+
+    def search_names(self, query, **kwargs):
+        return [search_result.marker_name for search_result in self.marker_database.search(query, **kwargs)]
+
+    def test_import_ten_hour_timecode(self):
+        project_file = self.parse(samplelibrary.create_conformed_library(tc_start_hours=10))
+        row_counts = self.marker_database.import_project_files([project_file])
+        self.assertEqual(row_counts['markers'], self.count_rows('markers'))
+
+        timeline = project_file.get_timelines()[0]
+        first_marker = min(timeline.markers, key=lambda marker: marker.timecode_info.start)
+        stored_start, timebase = self.marker_database.connection.execute(
+            "SELECT MIN(markers.start_ticks), project_files.timebase FROM markers JOIN timelines ON timelines.id = markers.timeline_id "
+            "JOIN project_files ON project_files.id = markers.project_file_id WHERE timelines.name = ?", (timeline.name,)
+        ).fetchone()
+        self.assertEqual(Fraction(stored_start, timebase), first_marker.timecode_info.as_fraction(first_marker.timecode_info.start))
+        self.assertGreaterEqual(Fraction(stored_start, timebase), 10 * 60 * 60 - 60)
+
+    def test_time_too_large_raises_and_rolls_back(self):
+        self.marker_database.import_project_files([self.parse(samplelibrary.create_library(events=1))])
+        marker_count = self.count_rows('markers')
+
+        timebase = 10 ** 15
+        project_file = ProjectFile("Huge", "file:///Users/editor/Movies/Huge.fcpbundle/", timebase=timebase)
+        timeline = Timeline("Long timeline", TimecodeInfo((25, 1), (0, 1), (48 * 60 * 60, 1), timebase=timebase), "Huge")
+        timeline.add_marker(Marker("Two days in", "marker", TimecodeInfo((25, 1), (48 * 60 * 60, 1), (1, 25), timebase=timebase)))
+        project_file.add_item(timeline)
+
+        with self.assertRaisesRegex(ValueError, "too large to store in SQLite"):
+            self.marker_database.import_project_files([project_file])
+        self.assertEqual(self.count_rows('markers'), marker_count)
+        self.assertEqual(self.count_rows('project_files'), 1)
+
+    def test_search_matches_every_term(self):
+        self.import_marker_names(["Todo VFX 1", "Todo audio", "VFX cleanup", "todo: vfx, again"])
+        self.assertEqual(self.search_names("todo vfx"), ["Todo VFX 1", "todo: vfx, again"])
+        self.assertEqual(self.search_names("VFX TODO"), ["Todo VFX 1", "todo: vfx, again"])
+        self.assertEqual(self.search_names("todo vfx missing"), [])
+        self.assertEqual(self.search_names("todo", limit=1), ["Todo VFX 1"])
+
+    def test_search_prefix_only_applies_to_last_term(self):
+        self.import_marker_names(["Music cue 12", "Music cue 2", "Musical number"])
+        self.assertEqual(self.search_names("music cue 1"), ["Music cue 12"])
+        self.assertEqual(self.search_names("music"), ["Music cue 12", "Music cue 2", "Musical number"])
+        self.assertEqual(self.search_names("music", prefix=False), ["Music cue 12", "Music cue 2"])
+        self.assertEqual(self.search_names("mus cue"), [])
+
+    def test_search_without_words(self):
+        self.import_marker_names(["Intro", "?!"])
+        self.assertEqual(self.search_names(""), [])
+        self.assertEqual(self.search_names("?! -- ..."), [])
+
+    def test_reimport_replaces_search_tokens(self):
+        self.import_marker_names(["Old name", "Shared"])
+        self.import_marker_names(["Other library"], library_name="Other")
+        self.import_marker_names(["New name", "Shared"])
+        self.assertEqual(self.search_names("old"), [])
+        self.assertEqual(self.search_names("name"), ["New name"])
+        self.assertEqual(self.search_names("shared"), ["Shared"])
+        self.assertEqual(self.search_names("library"), ["Other library"])
+        self.assertEqual(self.count_rows('marker_tokens'), 5)
+
+if __name__ == '__main__':
+    unittest.main()
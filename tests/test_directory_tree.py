@@ -0,0 +1,69 @@
+import unittest
+from fcpx_marker_tool.common.filemanagement import DirectoryTree
+from fcpx_marker_tool.common.projectclasses import Clip, Timeline
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+
+def create_items():
+    timecode_info = TimecodeInfo((25, 1), (0, 1), (10, 1), timebase=25)
+    return [
+        Timeline("Main Edit", timecode_info, "Library/Event A"),
+        Clip("Interview", "asset-clip", timecode_info, "Library/Event A"),
+        Timeline("Trailer", timecode_info, "Library/Event B/Sub"),
+        Clip("B-roll", "asset-clip", timecode_info, "Library/Event B")
+    ]
+
+class DirectoryTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory_tree = DirectoryTree(create_items())
+
+    def tree(self, **filters):
+        return list(self.directory_tree.iter_tree(**filters))
+
+    def test_unfiltered(self):
+        self.assertEqual(self.tree(), [
+            "└── Library",
+            "    ├── Event A",
+            "    │   ├── [1] Main Edit",
+            "    │   └── [2] Interview",
+            "    └── Event B",
+            "        ├── Sub",
+            "        │   └── [3] Trailer",
+            "        └── [4] B-roll"
+        ])
+
+    def test_item_type(self):
+        self.assertEqual(self.tree(item_type=Timeline), [
+            "└── Library",
+            "    ├── Event A",
+            "    │   └── [1] Main Edit",
+            "    └── Event B",
+            "        └── Sub",
+            "            └── [3] Trailer"
+        ])
+
+    def test_name_and_folder_globs(self):
+        # folders without a match are left out, and connectors are chosen from what's still shown
+        self.assertEqual(self.tree(name="b-*"), ["└── Library", "    └── Event B", "        └── [4] B-roll"])
+        self.assertEqual(self.tree(folder="SUB"), ["└── Library", "    └── Event B", "        └── Sub", "            └── [3] Trailer"])
+        self.assertEqual(self.tree(folder="event *", item_type=Clip, name="*view"),
+                         ["└── Library", "    └── Event A", "        └── [2] Interview"])
+        self.assertEqual(self.tree(name="missing"), [])
+
+    def test_max_depth(self):
+        self.assertEqual(self.tree(max_depth=0), ["└── Library (4 items)"])
+        self.assertEqual(self.tree(max_depth=1), ["└── Library", "    ├── Event A (2 items)", "    └── Event B (2 items)"])
+        self.assertEqual(self.tree(max_depth=1, item_type=Timeline),
+                         ["└── Library", "    ├── Event A (1 items)", "    └── Event B (1 items)"])
+
+    def test_pages(self):
+        for filters in ({}, {'item_type': Timeline}, {'max_depth': 1}):
+            with self.subTest(filters=filters):
+                pages = list(self.directory_tree.iter_pages(3, **filters))
+                self.assertTrue(all(len(page) == 3 for page in pages[:-1]))
+                self.assertTrue(0 < len(pages[-1]) <= 3)
+                self.assertEqual([line for page in pages for line in page], self.tree(**filters))
+        self.assertEqual(list(self.directory_tree.iter_pages(3, name="missing")), [])
+
+if __name__ == '__main__':
+    unittest.main()
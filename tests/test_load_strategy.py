@@ -0,0 +1,65 @@
+import tempfile
+import unittest
+from pathlib import Path
+from fcpx_marker_tool.parsers.fcpxparser import FCPXParser, StreamingFCPXParser
+from fcpx_marker_tool.parsers.parseprogress import ParseProgress, ParseCancelled
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+def item_names(project_file):
+    return [(str(item.project_path), item.name, len(item.markers)) for item in project_file.items]
+
+class LoadStrategyTest(unittest.TestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        library_text = samplelibrary.create_library(events=2, browser_clips=3, projects=4, clips=30)
+        self.library_path = samplelibrary.write_library(Path(temporary_directory.name) / 'library.fcpxml', library_text)
+        self.memory_estimate = XMLParser(self.library_path).estimate_memory()
+        self.expected = item_names(XMLParser(self.library_path).create_parser().parse_xml())
+
+    def parse(self, memory_budget):
+        parser = XMLParser(self.library_path, ParseProgress(memory_budget=memory_budget)).create_parser()
+        return parser, parser.parse_xml()
+
+    def test_whole_file_loaded_without_a_budget(self):
+        parser, project_file = self.parse(None)
+        self.assertIs(type(parser), FCPXParser)
+        self.assertEqual(project_file.load_strategy, 'tree')
+        self.assertIsNone(project_file.peak_memory)
+
+    def test_whole_file_loaded_within_budget(self):
+        parser, project_file = self.parse(self.memory_estimate.tree_peak)
+        self.assertIs(type(parser), FCPXParser)
+        self.assertEqual(project_file.load_strategy, 'tree')
+        self.assertEqual(item_names(project_file), self.expected)
+        self.assertGreater(project_file.peak_memory, 0)
+
+    def test_streamed_when_tree_is_over_budget(self):
+        parser, project_file = self.parse(self.memory_estimate.tree_peak - 1)
+        self.assertIs(type(parser), StreamingFCPXParser)
+        self.assertEqual(project_file.load_strategy, 'streaming')
+        self.assertEqual(item_names(project_file), self.expected)
+        self.assertLess(project_file.peak_memory, self.memory_estimate.tree_peak)
+
+        # every later parse is still streamed and reports it
+        self.assertEqual(parser.parse_xml().load_strategy, 'streaming')
+
+    def test_refused_when_streaming_is_over_budget(self):
+        progress = ParseProgress(memory_budget=self.memory_estimate.streaming_peak - 1)
+        with self.assertRaisesRegex(ParseCancelled, "one event at a time"):
+            XMLParser(self.library_path, progress).create_parser()
+        self.assertEqual(progress.bytes_read, 0)
+
+    def test_refused_without_a_streaming_parser(self):
+        class TreeOnlyParser(FCPXParser):
+            pass
+
+        XMLParser.register_parser("fcpxml", TreeOnlyParser, version="1.10")
+        self.addCleanup(XMLParser.version_parser_types.pop, ("fcpxml", "1.10"))
+        with self.assertRaisesRegex(ParseCancelled, "needed to load this file"):
+            XMLParser(self.library_path, ParseProgress(memory_budget=self.memory_estimate.tree_peak - 1)).create_parser()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+from pathlib import Path
+from fcpx_marker_tool.parsers.parsefilter import ParseFilter
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+def marker_count(project_file):
+    return sum(len(item.markers) for item in project_file.items)
+
+class MarkerCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.library_path = samplelibrary.write_library(Path(temporary_directory.name) / 'library.fcpxml',
+                                                        samplelibrary.create_reused_library(assets=10, events=2, projects=3, clips=20))
+
+    def test_cache_hits(self):
+        parser = XMLParser(self.library_path).create_parser()
+        parser.parse_xml()
+        self.assertGreater(parser.marker_cache_stats.hits, 0)
+        self.assertEqual(parser.marker_cache_stats.size, parser.marker_cache_stats.misses)
+
+    def test_parse_filter_is_read_only(self):
+        parser = XMLParser(self.library_path).create_parser()
+        with self.assertRaises(AttributeError):
+            parser.parse_filter = ParseFilter(marker_types=['to-do'])
+
+    def test_parse_filter_changed_in_place(self):
+        parse_filter = ParseFilter()
+        parser = XMLParser(self.library_path).create_parser(parse_filter)
+        unfiltered_count = marker_count(parser.parse_xml())
+
+        parse_filter.marker_types = ['to-do']
+        expected_count = marker_count(XMLParser(self.library_path).create_parser(ParseFilter(marker_types=['to-do'])).parse_xml())
+        self.assertLess(expected_count, unfiltered_count)
+        self.assertEqual(marker_count(parser.parse_xml()), expected_count)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+from pathlib import Path
+from fcpx_marker_tool.parsers.parsefilter import ParseFilter
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+class MarkerDedupTest(unittest.TestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = Path(temporary_directory.name)
+
+    def timeline_markers(self, library_text, parse_filter=None):
+        library_path = samplelibrary.write_library(self.directory / 'library.fcpxml', library_text)
+        timeline, = XMLParser(library_path).create_parser(parse_filter).parse_xml().get_timelines()
+        return timeline.markers
+
+    def test_policies(self):
+        # each marker is seen on the primary clip, two connected clips at the same time, and two connected clips one frame late
+        library_text = samplelibrary.create_overlapping_library(projects=1, clips=2, lanes=4, markers=10)
+        for parse_filter, copies in ((None, 5), (ParseFilter(duplicate_markers='keep-all'), 5),
+                                     (ParseFilter(duplicate_markers='keep-first'), 2),
+                                     (ParseFilter(duplicate_markers='keep-first', duplicate_tolerance=1), 1)):
+            with self.subTest(copies=copies):
+                self.assertEqual(len(self.timeline_markers(library_text, parse_filter)), 2 * 10 * copies)
+
+    def test_completed_status_is_not_a_duplicate(self):
+        to_dos = ('<marker start="3003/30000s" duration="1001/30000s" value="Fix" completed="0"/>'
+                  '<marker start="3003/30000s" duration="1001/30000s" value="Fix" completed="1"/>')
+        library_text = '\n'.join(samplelibrary.HEADER[:5] + [
+            '<asset id="a0" name="Asset 0" start="0s" duration="300300/30000s" hasVideo="1" format="r1">'
+            '<media-rep kind="original-media" src="file:///Volumes/Media/clip0.mov"/></asset>',
+            '</resources>', '<library location="file:///Users/editor/Movies/Sample.fcpbundle/">', '<event name="Event 0">',
+            '<project name="Project 0"><sequence format="r1" duration="300300/30000s" tcStart="0s" tcFormat="NDF"><spine>',
+            f'<asset-clip ref="a0" offset="0s" name="Clip" start="0s" duration="300300/30000s" tcFormat="NDF">{to_dos}'
+            f'<asset-clip ref="a0" lane="1" offset="0s" name="Connected" start="0s" duration="300300/30000s" tcFormat="NDF">{to_dos}</asset-clip>'
+            '</asset-clip>',
+            '</spine></sequence></project>', '</event>', '</library></fcpxml>'
+        ])
+        markers = self.timeline_markers(library_text, ParseFilter(duplicate_markers='keep-first'))
+        self.assertEqual(sorted(marker.completed for marker in markers), [False, True])
+
+if __name__ == '__main__':
+    unittest.main()
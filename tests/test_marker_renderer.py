@@ -0,0 +1,65 @@
+import random
+import unittest
+from fractions import Fraction
+from fcpx_marker_tool.common.filemanagement import MarkerRenderer, OutputFormatting
+from fcpx_marker_tool.common.projectclasses import Marker
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+
+FRAME_RATES = [(24000, 1001), (24, 1), (25, 1), (30000, 1001), (30, 1), (50, 1), (60000, 1001), (60, 1)]
+
+class MarkerRendererTest(unittest.TestCase):
+
+    def create_markers(self, frame_rate, non_drop_frame, count=500, seed=1):
+        # random starts up to ten hours, on and between frames
+        rng = random.Random(seed)
+        frame_duration = Fraction(frame_rate[1], frame_rate[0])
+        markers = []
+        for index in range(count):
+            start = frame_duration * rng.randint(0, 10 * 60 * 60 * 60) + frame_duration * Fraction(rng.randint(0, 3), 4)
+            timecode_info = TimecodeInfo(frame_rate, start, frame_duration, non_drop_frame=non_drop_frame, timebase=frame_rate[0] * 4)
+            markers.append(Marker(f"Marker {index}", "marker", timecode_info))
+        return markers
+
+    def format_with_timecode_info(self, marker, formatting_option):
+        # TimecodeInfo formats each time with a new Timecode object, so this pins MarkerRenderer to the timecode module's own output
+        timecode_info = marker.timecode_info
+        start, frame_rate, non_drop_frame = timecode_info.start, timecode_info.frame_rate, timecode_info.non_drop_frame
+        if formatting_option == "Youtube":
+            return f"{timecode_info.as_hr_min_sec(start, frame_rate, non_drop_frame)} {marker.name}"
+        elif formatting_option == "DVD Studio Pro":
+            return f"{timecode_info.as_timecode(start, frame_rate, non_drop_frame)} {marker.name}"
+        elif formatting_option == "Marker Name - Frames":
+            return f"{marker.name} - {timecode_info.as_frame(start, frame_rate)}"
+        return f"{marker.name} - {timecode_info.as_fractional_timecode(start, frame_rate, non_drop_frame)}"
+
+    def test_matches_timecode_module(self):
+        marker_renderer = MarkerRenderer(OutputFormatting.FORMATTING_OPTIONS)
+        for frame_rate in FRAME_RATES:
+            for non_drop_frame in (True, False):
+                markers = self.create_markers(frame_rate, non_drop_frame)
+                rendered = marker_renderer.render(markers)
+                sorted_markers = sorted(markers, key=lambda marker: marker.timecode_info.start)
+                for formatting_option in OutputFormatting.FORMATTING_OPTIONS:
+                    with self.subTest(frame_rate=frame_rate, non_drop_frame=non_drop_frame, formatting_option=formatting_option):
+                        expected = [self.format_with_timecode_info(marker, formatting_option) for marker in sorted_markers]
+                        self.assertEqual(rendered[formatting_option], expected)
+
+    def test_output_formatting_single_item(self):
+        marker = self.create_markers((30000, 1001), False, count=1)[0]
+        for formatting_option in OutputFormatting.FORMATTING_OPTIONS:
+            with self.subTest(formatting_option=formatting_option):
+                self.assertEqual(OutputFormatting(marker, formatting_option).formatted, self.format_with_timecode_info(marker, formatting_option))
+
+    def test_single_option(self):
+        markers = self.create_markers((30000, 1001), False, count=50)
+        rendered = MarkerRenderer(["Marker Name - Fractional Timecode"]).render(markers)
+        self.assertEqual(list(rendered), ["Marker Name - Fractional Timecode"])
+        self.assertEqual(rendered["Marker Name - Fractional Timecode"],
+                         OutputFormatting.format_marker_list(markers, "Marker Name - Fractional Timecode"))
+
+    def test_invalid_option(self):
+        with self.assertRaises(ValueError):
+            MarkerRenderer(["Not a format"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from fractions import Fraction
+from fcpx_marker_tool.common.markerstream import MarkerSource, merge_markers
+from fcpx_marker_tool.common.projectclasses import Marker, Timeline
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+
+def create_timeline(name, frame_rate, starts):
+    # frame_rate is also the timebase, so sources have different timebases, starts are in seconds and given out of order
+    timebase = frame_rate[0]
+    timeline = Timeline(name, TimecodeInfo(frame_rate, (0, 1), (600, 1), timebase=timebase), "Library/Event")
+    for start in starts:
+        timecode_info = TimecodeInfo(frame_rate, Fraction(start), (frame_rate[1], frame_rate[0]), timebase=timebase)
+        timeline.add_marker(Marker(f"{name} {start}", "marker", timecode_info))
+    return timeline
+
+def merged_rows(sources):
+    return [(marker.name, marker.timecode_info.as_fraction(marker.timecode_info.start)) for marker in merge_markers(sources)]
+
+class MergeMarkersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.first = create_timeline("A", (25, 1), [20, 0, 10])
+        self.second = create_timeline("B", (30000, 1001), [5, Fraction(1001, 30000) * 300, 0])
+
+    def test_start_order_with_offsets(self):
+        self.assertEqual(merged_rows([MarkerSource(self.first), MarkerSource(self.second, 12)]), [
+            ("A 0", 0), ("A 10", 10), ("B 0", 12), ("B 5", 17), ("A 20", 20), ("B 1001/100", Fraction(1001, 100) + 12)
+        ])
+
+    def test_offset_types(self):
+        expected = merged_rows([(self.second, Fraction(3, 2))])
+        self.assertEqual(expected[0], ("B 0", Fraction(3, 2)))
+        self.assertEqual(merged_rows([(self.second, (3, 2))]), expected)
+        self.assertEqual(merged_rows([(self.second, 1)])[0], ("B 0", 1))
+        with self.assertRaises(ValueError):
+            merge_markers([(self.second, 1.5)])
+
+    def test_equal_starts_keep_source_order(self):
+        merged = merged_rows([(self.second, 15), (self.first, 0), (self.second, 10)])
+        self.assertEqual([name for name, start in merged if start == 10], ["A 10", "B 0"])
+        self.assertEqual([name for name, start in merged if start == 15], ["B 0", "B 5"])
+        self.assertEqual([name for name, start in merged if start == 20], ["B 5", "A 20"])
+        self.assertEqual(len(merged), 9)
+
+    def test_negative_offsets(self):
+        later = create_timeline("C", (25, 1), [30, 10])
+        self.assertEqual(merged_rows([(later, -10), (self.first, 0)]), [
+            ("C 10", 0), ("A 0", 0), ("A 10", 10), ("C 30", 20), ("A 20", 20)
+        ])
+        with self.assertRaisesRegex(ValueError, "before zero"):
+            merge_markers([(self.first, 0), (self.second, Fraction(-1, 2))])
+
+    def test_shares_a_timebase_without_changing_sources(self):
+        merged = list(merge_markers([(self.first, Fraction(1, 7)), (self.second, 0)]))
+        self.assertEqual({marker.timecode_info.timebase for marker in merged}, {7 * 30000})
+        self.assertEqual([marker.timecode_info.timebase for marker in self.first.markers], [25, 25, 25])
+        self.assertEqual([marker.name for marker in self.first.markers], ["A 20", "A 0", "A 10"])
+        self.assertEqual(merged[1].timecode_info.as_fraction(merged[1].timecode_info.start), Fraction(1, 7))
+
+    def test_lazy(self):
+        merged = merge_markers([(self.first, 0), (self.second, 0)])
+        self.assertEqual(next(merged).name, "A 0")
+        self.assertEqual(len(list(merged)), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from fcpx_marker_tool.common import markertable
+from fcpx_marker_tool.common.markertable import MarkerTable
+from fcpx_marker_tool.common.projectclasses import Marker
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+
+def marker_row(marker):
+    timecode_info = marker.timecode_info
+    return (marker.name, marker.marker_type, marker.completed, timecode_info.as_fraction(timecode_info.start),
+            timecode_info.as_fraction(timecode_info.duration), timecode_info.frame_rate, timecode_info.non_drop_frame)
+
+def create_markers():
+    # mixed timebases, types, and names of different UTF-8 lengths, including an empty one, added out of order
+    markers = []
+    names = ["Intro", "Café scene", "", "Todo VFX 1", "Chapter 2", "Todo VFX 2", "Music cue 12", "Ünïcödé ✓", "Outro", "Todo audio"]
+    for index, name in enumerate(names):
+        frame_rate = (24, 1) if index % 2 else (30000, 1001)
+        start = ((index * 7) % 10 * frame_rate[1], frame_rate[0])
+        timecode_info = TimecodeInfo(frame_rate, start, (frame_rate[1], frame_rate[0]), non_drop_frame=index % 3 != 0, timebase=frame_rate[0])
+        if name.startswith("Todo"):
+            markers.append(Marker(name, "to-do", timecode_info, completed=index % 2 == 1))
+        else:
+            markers.append(Marker(name, "chapter-marker" if name.startswith("Chapter") else "marker", timecode_info))
+    return markers
+
+class MarkerTableTest(unittest.TestCase):
+    """Runs with numpy when it's installed, MarkerTableWithoutNumpyTest runs the same tests on the array.array fallbacks"""
+
+    def setUp(self):
+        self.markers = create_markers()
+        self.table = MarkerTable.from_markers(self.markers)
+
+    def rows(self, table):
+        return [marker_row(marker) for marker in table]
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.table), len(self.markers))
+        self.assertEqual(self.rows(self.table), [marker_row(marker) for marker in self.markers])
+        self.assertEqual(marker_row(self.table[-1]), marker_row(self.markers[-1]))
+        with self.assertRaises(IndexError):
+            self.table[len(self.markers)]
+
+    def test_sort(self):
+        by_start = sorted(self.markers, key=lambda marker: marker.timecode_info.as_fraction(marker.timecode_info.start))
+        self.assertEqual(self.rows(self.table.sort()), [marker_row(marker) for marker in by_start])
+        by_name = sorted(self.markers, key=lambda marker: marker.name)
+        self.assertEqual(self.rows(self.table.sort('name')), [marker_row(marker) for marker in by_name])
+
+    def test_filter(self):
+        expected = [marker for marker in self.markers if marker.marker_type != 'to-do' or not marker.completed]
+        self.assertEqual(self.rows(self.table.filter(completed=False)), [marker_row(marker) for marker in expected])
+
+        expected = [marker for marker in self.markers if marker.marker_type in ('to-do', 'chapter-marker')]
+        self.assertEqual(self.rows(self.table.filter(marker_types=['to-do', 'chapter-marker'])), [marker_row(marker) for marker in expected])
+
+        start, end = self.table.timebase // 10, self.table.timebase // 3
+        expected = [marker for marker in self.markers if start <= self.table.timebase * marker.timecode_info.as_fraction(marker.timecode_info.start) < end]
+        self.assertTrue(expected)
+        self.assertEqual(self.rows(self.table.filter(start=start, end=end)), [marker_row(marker) for marker in expected])
+
+        self.assertEqual([marker.name for marker in self.table.filter(name='todo vfx*')], ["Todo VFX 1", "Todo VFX 2"])
+
+    def test_between(self):
+        sorted_table = self.table.sort()
+        start, end = self.table.timebase // 10, self.table.timebase // 3
+        self.assertEqual(self.rows(sorted_table.between(start, end)), self.rows(sorted_table.filter(start=start, end=end)))
+        self.assertEqual(len(sorted_table.between(end, start)), 0)
+
+    def test_take(self):
+        # repeated, reversed, and empty-named rows exercise the name gather
+        indices = [9, 2, 2, 7, 0, 1]
+        self.assertEqual(self.rows(self.table.take(indices)), [marker_row(self.markers[index]) for index in indices])
+        self.assertEqual(len(self.table.take([])), 0)
+        self.assertEqual(self.rows(self.table[::3]), [marker_row(marker) for marker in self.markers[::3]])
+
+    def test_column_buffers(self):
+        buffers = self.table.column_buffers()
+        self.assertEqual(buffers['start'].format, 'q')
+        self.assertEqual(bytes(buffers['names']), "".join(marker.name for marker in self.markers).encode('utf-8'))
+
+    def test_too_large_raises(self):
+        timecode_info = TimecodeInfo((24, 1), (48 * 60 * 60, 1), (1, 24), timebase=24 * 10 ** 14)
+        with self.assertRaisesRegex(ValueError, "too far from zero"):
+            MarkerTable.from_markers([Marker("Two days in", "marker", timecode_info)])
+
+@unittest.skipIf(markertable.numpy is None, "numpy isn't installed")
+class MarkerTableNumpyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = MarkerTable.from_markers(create_markers())
+
+    def rows(self, table):
+        return [marker_row(marker) for marker in table]
+
+    def test_to_numpy_shares_memory(self):
+        arrays = self.table.to_numpy()
+        arrays['start'][0] = 12345
+        self.assertEqual(self.table.columns['start'][0], 12345)
+        self.assertEqual(arrays['names'].tobytes(), bytes(self.table.names))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for file_name, mmap in (('table.npz', True), ('table', True), ('table', False)):
+                with self.subTest(file_name=file_name, mmap=mmap):
+                    loaded_table = MarkerTable.load(self.table.save(Path(directory) / file_name), mmap=mmap)
+                    self.assertEqual(loaded_table.timebase, self.table.timebase)
+                    self.assertEqual(self.rows(loaded_table), self.rows(self.table))
+                    self.assertEqual(self.rows(loaded_table.sort()), self.rows(self.table.sort()))
+                    if file_name == 'table' and mmap:
+                        self.assertIsInstance(loaded_table.columns['start'], markertable.numpy.memmap)
+
+                    # the array.array fallbacks work on loaded numpy columns too
+                    with mock.patch.object(markertable, 'numpy', None):
+                        self.assertEqual(self.rows(loaded_table.take([3, 1])), self.rows(self.table.take([3, 1])))
+                        self.assertEqual(self.rows(loaded_table.filter(completed=True)), self.rows(self.table.filter(completed=True)))
+                    del loaded_table
+
+class MarkerTableWithoutNumpyTest(MarkerTableTest):
+
+    def setUp(self):
+        patcher = mock.patch.object(markertable, 'numpy', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+    def test_numpy_required(self):
+        with self.assertRaises(ImportError):
+            self.table.to_numpy()
+        with tempfile.TemporaryDirectory() as directory, self.assertRaises(ImportError):
+            self.table.save(Path(directory) / 'table.npz')
+
+if __name__ == '__main__':
+    unittest.main()
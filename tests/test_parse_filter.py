@@ -0,0 +1,65 @@
+import tempfile
+import unittest
+from pathlib import Path
+from fcpx_marker_tool.common.projectclasses import Timeline
+from fcpx_marker_tool.parsers.fcpxparser import StreamingFCPXParser
+from fcpx_marker_tool.parsers.parsefilter import ParseFilter
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+FILTERS = [
+    ParseFilter(event="event 1"),
+    ParseFilter(event="EVENT [02]", project="project 1*"),
+    ParseFilter(item_type='timeline'),
+    ParseFilter(item_type='clip', project="browser *"),
+    ParseFilter(marker_types=['to-do'], completed=False),
+    ParseFilter(marker_types=['marker', 'chapter-marker']),
+    ParseFilter(event="event 2", item_type='timeline', marker_types=['to-do'], completed=True)
+]
+
+def marker_rows(markers):
+    return [(marker.name, marker.marker_type, marker.completed, marker.timecode_info.start) for marker in markers]
+
+def item_rows(items, parse_filter=None):
+    # filters a parse made without parse_filter the same way the parser is meant to, or describes filtered items as they are
+    rows = []
+    for item in items:
+        item_type = 'timeline' if isinstance(item, Timeline) else 'clip'
+        if parse_filter is not None and not (parse_filter.match_event(item.project_path.name) and parse_filter.match_item(item_type, item.name)):
+            continue
+
+        def filtered(markers):
+            if parse_filter is None:
+                return marker_rows(markers)
+            return marker_rows(marker for marker in markers if parse_filter.match_marker(marker.marker_type, marker.completed))
+
+        clips = [(clip.name, filtered(clip.markers)) for clip in item.clips] if item_type == 'timeline' else []
+        rows.append((item_type, str(item.project_path), item.name, filtered(item.markers), clips))
+    return rows
+
+class ParseFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        library_text = samplelibrary.create_library(events=3, browser_clips=4, projects=3, clips=20, markers=6)
+        self.library_path = samplelibrary.write_library(Path(temporary_directory.name) / 'library.fcpxml', library_text)
+        self.unfiltered_items = XMLParser(self.library_path).create_parser().parse_xml().items
+
+    def test_pushdown_matches_filtering_after_parse(self):
+        for parse_filter in FILTERS:
+            expected = item_rows(self.unfiltered_items, parse_filter)
+            self.assertTrue(any(row[3] for row in expected))
+            self.assertLess(sum(len(row[3]) for row in expected), sum(len(item.markers) for item in self.unfiltered_items))
+
+            parsers = {
+                'tree': XMLParser(self.library_path).create_parser(parse_filter),
+                'streaming': StreamingFCPXParser(self.library_path, parse_filter)
+            }
+            for parser_name, parser in parsers.items():
+                for max_workers in (None, 4):
+                    with self.subTest(parse_filter=vars(parse_filter), parser=parser_name, max_workers=max_workers):
+                        self.assertEqual(item_rows(parser.parse_xml(max_workers).items), expected)
+
+if __name__ == '__main__':
+    unittest.main()
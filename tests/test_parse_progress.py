@@ -0,0 +1,126 @@
+import tempfile
+import threading
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest import mock
+from fcpx_marker_tool.parsers import parseprogress
+from fcpx_marker_tool.parsers.parseprogress import ParseProgress, ParseCancelled
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+def item_names(project_file):
+    return [(str(item.project_path), item.name, len(item.markers)) for item in project_file.items]
+
+class ParseProgressTest(unittest.TestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        library_text = samplelibrary.create_library(events=2, browser_clips=3, projects=4, clips=30)
+        self.library_path = samplelibrary.write_library(Path(temporary_directory.name) / 'library.fcpxml', library_text)
+        self.parser = XMLParser(self.library_path).create_parser()
+        self.expected = item_names(self.parser.parse_xml())
+
+    def cancel_after_clips(self, clip_count):
+        def cancel(progress):
+            if progress.counts['clips'] >= clip_count:
+                progress.cancel()
+        return ParseProgress(cancel, report_interval=0)
+
+    def test_cancel_keeps_finished_items(self):
+        for max_workers in (None, 4):
+            with self.subTest(max_workers=max_workers), self.assertRaises(ParseCancelled) as context:
+                self.parser.parse_xml(max_workers, progress=self.cancel_after_clips(40))
+            partial_items = item_names(context.exception.partial_result)
+            self.assertEqual(context.exception.reason, "Parse cancelled")
+            self.assertLess(len(partial_items), len(self.expected))
+            self.assertEqual(partial_items, self.expected[:len(partial_items)])
+
+    def test_progress_is_restarted_for_each_parse(self):
+        progress = ParseProgress()
+        progress.cancel()
+        self.assertEqual(item_names(self.parser.parse_xml(progress=progress)), self.expected)
+        counts = dict(progress.counts)
+        self.parser.parse_xml(progress=progress)
+        self.assertEqual(progress.counts, counts)
+        self.assertEqual(progress.items_done, progress.total_items)
+
+        # parses without a ParseProgress of their own only take the parser's callback and budgets, not its state
+        parser = XMLParser(self.library_path, self.cancel_after_clips(40)).create_parser()
+        for _ in range(2):
+            with self.assertRaises(ParseCancelled):
+                parser.parse_xml()
+        self.assertFalse(parser.progress.counts['clips'])
+
+        parser = XMLParser(self.library_path, ParseProgress()).create_parser()
+        parser.progress.cancel()
+        self.assertEqual(item_names(parser.parse_xml()), self.expected)
+
+    def test_time_budget_applies_to_each_parse(self):
+        clock = [1000.0]
+        with mock.patch.object(parseprogress.time, 'monotonic', lambda: clock[0]):
+            parser = XMLParser(self.library_path, ParseProgress(time_budget=2)).create_parser()
+            self.assertEqual(item_names(parser.parse_xml()), self.expected)
+            clock[0] += 3
+            self.assertEqual(item_names(parser.parse_xml()), self.expected)
+
+            def advance(progress):
+                clock[0] += 1
+            with self.assertRaises(ParseCancelled) as context:
+                parser.parse_xml(progress=ParseProgress(advance, time_budget=2, report_interval=0))
+        self.assertEqual(context.exception.reason, "Time budget of 2s exceeded")
+        self.assertLess(len(context.exception.partial_result.items), len(self.expected))
+
+    def test_memory_budget(self):
+        self.assertFalse(tracemalloc.is_tracing())
+        load_progress = ParseProgress(memory_budget=10 ** 9)
+        parser = XMLParser(self.library_path, load_progress).create_parser()
+        # loading stops the tracing it started, even though nothing has been parsed yet
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertGreater(load_progress.retained_memory, 0)
+
+        progress = ParseProgress(memory_budget=10 ** 9)
+        self.assertEqual(item_names(parser.parse_xml(progress=progress)), self.expected)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(progress.memory_baseline, load_progress.retained_memory)
+        self.assertGreater(progress.peak_memory, progress.memory_baseline)
+
+        # the loaded tree alone is over this budget
+        with self.assertRaises(ParseCancelled) as context:
+            parser.parse_xml(progress=ParseProgress(memory_budget=load_progress.retained_memory))
+        self.assertTrue(context.exception.reason.startswith("Memory budget"))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_overlapping_runs_keep_tracing(self):
+        first, second = ParseProgress(memory_budget=10 ** 9), ParseProgress(memory_budget=10 ** 9)
+        first.start()
+        second.start()
+        first.finish()
+        self.assertTrue(tracemalloc.is_tracing())
+        second.check()
+        self.assertIsNotNone(second.peak_memory)
+        second.finish()
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_concurrent_parses_count_separately(self):
+        final_counts = []
+        lock = threading.Lock()
+        def record(progress):
+            if progress.items_done == progress.total_items and progress.phase == 'parsing':
+                with lock:
+                    final_counts.append(dict(progress.counts))
+        parser = XMLParser(self.library_path, ParseProgress(record, report_interval=10)).create_parser()
+        serial_progress = ParseProgress()
+        parser.parse_xml(progress=serial_progress)
+
+        threads = [threading.Thread(target=parser.parse_xml) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(final_counts)
+        self.assertTrue(all(counts == serial_progress.counts for counts in final_counts))
+
+if __name__ == '__main__':
+    unittest.main()
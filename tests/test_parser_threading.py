@@ -0,0 +1,51 @@
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from fcpx_marker_tool.common.filemanagement import MarkerRenderer, OutputFormatting
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+def project_file_signature(project_file):
+    # everything an export reads from a ProjectFile, with each item's markers rendered in every format
+    marker_renderer = MarkerRenderer(OutputFormatting.FORMATTING_OPTIONS)
+    return [(type(item).__name__, str(item.project_path), item.name, marker_renderer.render(item.markers)) for item in project_file.items]
+
+class ParserThreadingTest(unittest.TestCase):
+
+    CALLS = 32
+    THREADS = 8
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        library_text = samplelibrary.create_library(events=2, browser_clips=3, projects=4, clips=30)
+        self.library_path = samplelibrary.write_library(Path(temporary_directory.name) / 'library.fcpxml', library_text)
+        self.parser = XMLParser(self.library_path).create_parser()
+
+    def test_concurrent_parses_match_serial_parse(self):
+        expected = project_file_signature(self.parser.parse_xml())
+        tree_before = ET.tostring(self.parser.xml_root)
+
+        # half of the calls also build their timelines on a thread pool of their own
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            futures = [executor.submit(self.parser.parse_xml, 4 if call % 2 else None) for call in range(self.CALLS)]
+            results = [future.result() for future in futures]
+
+        self.assertEqual(len({id(project_file) for project_file in results}), self.CALLS)
+        for call, project_file in enumerate(results):
+            with self.subTest(call=call):
+                self.assertEqual(project_file_signature(project_file), expected)
+        self.assertEqual(ET.tostring(self.parser.xml_root), tree_before)
+
+    def test_max_workers_matches_serial_parse(self):
+        serial_project_file = self.parser.parse_xml()
+        for max_workers in (1, 2, 8):
+            with self.subTest(max_workers=max_workers):
+                threaded_project_file = self.parser.parse_xml(max_workers=max_workers)
+                self.assertEqual(project_file_signature(threaded_project_file), project_file_signature(serial_project_file))
+                self.assertEqual(list(threaded_project_file.resource_usage), list(serial_project_file.resource_usage))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from pathlib import Path
+from fcpx_marker_tool.common.projectclasses import Clip, Marker, ProjectFile, Resource, ResourceUsage, Timeline
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+TIMECODE_INFO = TimecodeInfo((25, 1), (0, 1), (10, 1), timebase=25)
+
+def create_clip(name, resource_id=None, marker_count=0):
+    clip = Clip(name, "asset-clip" if resource_id is not None else "gap", TIMECODE_INFO, "Library/Event", resource_id=resource_id)
+    for index in range(marker_count):
+        clip.add_marker(Marker(f"{name} {index}", "marker", TIMECODE_INFO))
+    return clip
+
+def add_timeline_markers(timeline, clip):
+    # timeline markers come from a clip's markers the way FCPXParser creates them
+    for marker in clip.markers:
+        timeline_marker = Marker(marker.name, marker.marker_type, marker.timecode_info)
+        timeline_marker.source_clip = clip
+        timeline.add_marker(timeline_marker)
+
+class ResourceUsageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project_file = ProjectFile("Library", "file:///Users/editor/Movies/Library.fcpbundle/", timebase=25)
+        for resource_id, file_path in (("r1", "file:///Volumes/Media/a.mov"), ("r2", "file:///Volumes/Media/b.mov"),
+                                       ("r3", "file:///Volumes/Media/a.mov"), ("r4", "file:///Volumes/Media/unused.mov")):
+            self.project_file.add_resource(Resource(resource_id, resource_id, file_path, TIMECODE_INFO))
+
+        self.browser_clip = create_clip("Browser", "r1", marker_count=1)
+        self.timelines = [Timeline("First", TIMECODE_INFO, "Library/Event"), Timeline("Second", TIMECODE_INFO, "Library/Event")]
+        self.timeline_clips = [create_clip("First A", "r1", 2), create_clip("First gap"), create_clip("First B", "r2", 1),
+                               create_clip("Second A", "r3", 1), create_clip("Second A again", "r1")]
+        for timeline, clips in ((self.timelines[0], self.timeline_clips[:3]), (self.timelines[1], self.timeline_clips[3:])):
+            for clip in clips:
+                timeline.add_clip(clip)
+                add_timeline_markers(timeline, clip)
+
+        self.project_file.add_item(self.timelines[0])
+        self.project_file.add_item(self.browser_clip)
+        self.project_file.add_item(self.timelines[1])
+
+    def test_resource_usage(self):
+        usage = self.project_file.get_resource_usage("r1")
+        self.assertIsInstance(usage, ResourceUsage)
+        self.assertEqual(usage.clips, [self.timeline_clips[0], self.browser_clip, self.timeline_clips[4]])
+        self.assertEqual(usage.browser_clips, [self.browser_clip])
+        self.assertEqual(usage.timelines, self.timelines)
+        self.assertEqual([(timeline.name, marker.name) for timeline, marker in usage.timeline_markers],
+                         [("First", "First A 0"), ("First", "First A 1")])
+
+        # clips without a resource are collected under None, and unused resources have no entry
+        self.assertEqual(self.project_file.get_resource_usage(None).clips, [self.timeline_clips[1]])
+        self.assertIsNone(self.project_file.get_resource_usage("r4"))
+        self.assertIsNone(self.project_file.get_resource_usage("missing"))
+
+    def test_file_usage(self):
+        self.assertEqual([usage.resource_id for usage in self.project_file.get_file_usage("file:///Volumes/Media/a.mov")], ["r1", "r3"])
+        self.assertEqual([usage.resource_id for usage in self.project_file.get_file_usage("file:///Volumes/Media/b.mov")], ["r2"])
+        self.assertEqual(self.project_file.get_file_usage("file:///Volumes/Media/unused.mov"), [])
+        self.assertEqual(self.project_file.get_file_usage("file:///Volumes/Media/missing.mov"), [])
+
+    def test_parsed_library_matches_scan(self):
+        # the index built while items are added has to match a scan of the finished ProjectFile
+        with tempfile.TemporaryDirectory() as directory:
+            library_path = samplelibrary.write_library(Path(directory) / 'library.fcpxml', samplelibrary.create_library(events=2))
+            project_file = XMLParser(library_path).create_parser().parse_xml(max_workers=4)
+
+        scanned_clips, scanned_markers = {}, {}
+        for item in project_file.items:
+            for clip in item.clips if isinstance(item, Timeline) else [item]:
+                scanned_clips.setdefault(getattr(clip, 'resource_id', None), []).append(clip)
+            for marker in item.markers if isinstance(item, Timeline) else []:
+                resource_id = getattr(marker.source_clip, 'resource_id', None)
+                scanned_markers.setdefault(resource_id, []).append((item, marker))
+
+        self.assertEqual(set(project_file.resource_usage), set(scanned_clips))
+        for resource_id, clips in scanned_clips.items():
+            with self.subTest(resource_id=resource_id):
+                usage = project_file.get_resource_usage(resource_id)
+                self.assertEqual(usage.clips, clips)
+                self.assertEqual(usage.timeline_markers, scanned_markers.get(resource_id, []))
+        for resource in project_file.resources:
+            with self.subTest(file_path=resource.file_path):
+                self.assertEqual([usage.resource_id for usage in project_file.get_file_usage(resource.file_path)],
+                                 [resource.id] if resource.id in scanned_clips else [])
+
+if __name__ == '__main__':
+    unittest.main()
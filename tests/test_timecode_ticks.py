@@ -0,0 +1,152 @@
+import re
+import tempfile
+import unittest
+from fractions import Fraction
+from pathlib import Path
+from timecode import Timecode
+from fcpx_marker_tool.common.filemanagement import OutputFormatting
+from fcpx_marker_tool.common.projectclasses import Marker
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+from fcpx_marker_tool.parsers.fcpxparser import FCPXParser
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+FRAME_RATES = [(24000, 1001), (24, 1), (25, 1), (30000, 1001), (30, 1), (50, 1), (60000, 1001), (60, 1)]
+
+def fraction_frame(seconds, frame_rate):
+    # RationalTime.as_frame from before times were stored as ticks
+    return int((seconds.numerator * frame_rate[0]) / (seconds.denominator * frame_rate[1]))
+
+def fraction_format(marker, formatting_option):
+    # formats a marker the way OutputFormatting did with RationalTime, from its start in seconds
+    timecode_info = marker.timecode_info
+    frame_rate = timecode_info.conformed_frame_rate if timecode_info.conform_rate_check else timecode_info.frame_rate
+    frame = fraction_frame(timecode_info.as_fraction(timecode_info.start), frame_rate)
+    timecode_obj = Timecode(frame_rate, frames=frame + 1, force_non_drop_frame=timecode_info.non_drop_frame)
+
+    if formatting_option == "Youtube":
+        hr, min, sec = (str(value).zfill(2) for value in (timecode_obj.hrs, timecode_obj.mins, timecode_obj.secs))
+        return f"{hr + ':' if hr != '00' else ''}{min}:{sec} {marker.name}"
+    elif formatting_option == "DVD Studio Pro":
+        return f"{timecode_obj.tc_to_string(*timecode_obj.frames_to_tc(timecode_obj.frames))} {marker.name}"
+    elif formatting_option == "Marker Name - Frames":
+        return f"{marker.name} - {frame}"
+    timecode_obj.set_fractional(True)
+    return f"{marker.name} - {timecode_obj.tc_to_string(*timecode_obj.frames_to_tc(timecode_obj.frames))}"
+
+def fraction_format_marker_list(markers, formatting_option):
+    sorted_markers = sorted(markers, key=lambda marker: marker.timecode_info.as_fraction(marker.timecode_info.start))
+    return [fraction_format(marker, formatting_option) for marker in sorted_markers]
+
+def fraction_timeline_markers(timeline):
+    # FCPXParser._add_markers_to_timeline from before times were stored as ticks, run on the timeline's clips as Fractions of frames
+    timeline_rate = Fraction(*timeline.timecode_info.frame_rate)
+    timeline_markers = []
+    for clip in timeline.clips:
+        clip_info = clip.timecode_info
+        clip_rate = Fraction(*clip_info.conformed_frame_rate) if clip_info.conform_rate_check else timeline_rate
+        clip_start_fraction = clip_info.as_fraction(clip_info.start) * clip_rate
+        clip_offset_fraction = clip_info.as_fraction(clip_info.offset) * timeline_rate
+        clip_end_fraction = clip_offset_fraction + clip_info.as_fraction(clip_info.duration) * timeline_rate
+        for marker in clip.markers:
+            marker_info = marker.timecode_info
+            marker_rate = Fraction(*marker_info.conformed_frame_rate) if marker_info.conform_rate_check else timeline_rate
+            marker_timeline_start_fraction = marker_info.as_fraction(marker_info.start) * marker_rate - clip_start_fraction + clip_offset_fraction
+            if clip_offset_fraction <= marker_timeline_start_fraction < clip_end_fraction:
+                timeline_markers.append((marker.name, marker_timeline_start_fraction / timeline_rate, clip))
+    return timeline_markers
+
+class TimecodeTicksTest(unittest.TestCase):
+
+    def create_markers(self, frame_rate, non_drop_frame, conformed_frame_rate=None, timebase=None):
+        # frame-aligned, subframe, and hour-long starts, added out of order
+        frame_duration = Fraction(frame_rate[1], frame_rate[0])
+        starts = [frame_duration * 107892, frame_duration * 3 + Fraction(1, 3000), Fraction(0), frame_duration * 17982 + frame_duration / 2,
+                  Fraction(5), frame_duration * 1799]
+        markers = []
+        for index, start in enumerate(starts):
+            timecode_info = TimecodeInfo(frame_rate, start, frame_duration, non_drop_frame=non_drop_frame,
+                                         conformed_frame_rate=conformed_frame_rate, timebase=timebase)
+            markers.append(Marker(f"Marker {index}", "marker", timecode_info))
+        return markers
+
+    def assert_matches_fractions(self, markers):
+        for formatting_option in OutputFormatting.FORMATTING_OPTIONS:
+            with self.subTest(formatting_option=formatting_option):
+                self.assertEqual(OutputFormatting.format_marker_list(markers, formatting_option),
+                                 fraction_format_marker_list(markers, formatting_option))
+
+    def test_frame_rates(self):
+        for frame_rate in FRAME_RATES:
+            for non_drop_frame in (True, False):
+                if not non_drop_frame and frame_rate[1] != 1001:
+                    continue
+                with self.subTest(frame_rate=frame_rate, non_drop_frame=non_drop_frame):
+                    self.assert_matches_fractions(self.create_markers(frame_rate, non_drop_frame))
+
+    def test_conformed_frame_rates(self):
+        for frame_rate, conformed_frame_rate in [((24000, 1001), (2400, 100)), ((25, 1), (24000, 1001)), ((30000, 1001), (3000, 100))]:
+            with self.subTest(frame_rate=frame_rate, conformed_frame_rate=conformed_frame_rate):
+                self.assert_matches_fractions(self.create_markers(frame_rate, True, conformed_frame_rate))
+
+    def test_shared_timebase(self):
+        self.assert_matches_fractions(self.create_markers((30000, 1001), False, timebase=30000 * 3000))
+
+    def test_mixed_timebases(self):
+        markers = self.create_markers((24, 1), True) + self.create_markers((30000, 1001), True) + self.create_markers((25, 1), True)
+        self.assertGreater(len({marker.timecode_info.timebase for marker in markers}), 1)
+        self.assert_matches_fractions(markers)
+
+    def test_mixed_timebases_sort_by_seconds(self):
+        later = Marker("b", "marker", TimecodeInfo((24, 1), (5, 1), (0, 1)))
+        earlier = Marker("a", "marker", TimecodeInfo((30000, 1001), (1, 30), (0, 1)))
+        self.assertEqual(OutputFormatting.format_marker_list([later, earlier], "Youtube"), ["00:00 a", "00:05 b"])
+
+    def test_ticks_round_trip(self):
+        timecode_info = TimecodeInfo((30000, 1001), (1001, 30000), (1, 1), offset=Fraction(7, 2))
+        self.assertEqual(timecode_info.as_fraction(timecode_info.start), Fraction(1001, 30000))
+        self.assertEqual(timecode_info.as_fraction(timecode_info.offset), Fraction(7, 2))
+        timecode_info.start = timecode_info.start
+        self.assertEqual(timecode_info.as_fraction(timecode_info.start), Fraction(1001, 30000))
+
+    def test_inexact_time_raises(self):
+        with self.assertRaises(ValueError):
+            TimecodeInfo((24, 1), (1, 7), (0, 1), timebase=24)
+
+class TimelineProjectionTest(unittest.TestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = Path(temporary_directory.name)
+
+    def parse(self, library_text):
+        library_path = samplelibrary.write_library(self.directory / 'library.fcpxml', library_text)
+        parser = XMLParser(library_path).create_parser()
+        return parser, parser.parse_xml()
+
+    def test_conformed_library_matches_fractions(self):
+        for tc_start_hours in (0, 10):
+            with self.subTest(tc_start_hours=tc_start_hours):
+                parser, project_file = self.parse(samplelibrary.create_conformed_library(tc_start_hours))
+                self.assertLessEqual(parser.timebase, FCPXParser.MAX_TIMEBASE)
+                for timeline in project_file.get_timelines():
+                    timeline_markers = [(marker.name, marker.timecode_info.as_fraction(marker.timecode_info.start), marker.source_clip)
+                                        for marker in timeline.markers]
+                    self.assertTrue(timeline_markers)
+                    self.assertEqual(timeline_markers, fraction_timeline_markers(timeline))
+
+    def test_only_occurring_conform_rates_scale_the_timebase(self):
+        # 24 fps media conformed to a 23.98 timeline only needs its own times scaled by 1001/1000
+        parser, _ = self.parse(re.sub('srcFrameRate="[^"]*"', 'srcFrameRate="24"', samplelibrary.create_conformed_library()))
+        self.assertLess(parser.timebase, 10 ** 12)
+
+    def test_timebase_too_large_raises(self):
+        library_text = samplelibrary.create_library(events=1, browser_clips=1, projects=1, clips=2)
+        prime_markers = ''.join(f'<marker start="1/{prime}s" duration="1/{prime}s" value="Prime {prime}"/>' for prime in (1000003, 1000033, 1000037))
+        library_text = library_text.replace('</asset-clip>', f'{prime_markers}</asset-clip>', 1)
+        with self.assertRaisesRegex(ValueError, "64-bit"):
+            self.parse(library_text)
+
+if __name__ == '__main__':
+    unittest.main()
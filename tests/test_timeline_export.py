@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+from pathlib import Path
+from fcpx_marker_tool.common.filemanagement import OutputFormatting, TimelineExport
+from fcpx_marker_tool.common.projectclasses import Marker, ProjectFile, Timeline
+from fcpx_marker_tool.common.timecodeclasses import TimecodeInfo
+
+def create_timeline(name, project_path, marker_count=2):
+    timeline = Timeline(name, TimecodeInfo((25, 1), (0, 1), (60, 1), timebase=25), project_path)
+    for index in range(marker_count):
+        timeline.add_marker(Marker(f"{name} marker {index}", "marker", TimecodeInfo((25, 1), (index * 10, 1), (1, 25), timebase=25)))
+    return timeline
+
+class TimelineExportTest(unittest.TestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.output_directory = Path(temporary_directory.name)
+        self.project_file = ProjectFile("Library", "file:///Users/editor/Movies/Library.fcpbundle/", timebase=25)
+        self.timelines = [
+            create_timeline("Edit", "Library/Event A"),
+            create_timeline("edit", "Library/Event A"),
+            create_timeline("EDIT", "Library/Event A"),
+            create_timeline("Edit", "Library/Event B"),
+            create_timeline("Cut: v2/final?", "Library/Event: 1"),
+            create_timeline("..", "Library/Event A"),
+            create_timeline("Empty", "Library/Event A", marker_count=0)
+        ]
+        for timeline in self.timelines:
+            self.project_file.add_item(timeline)
+
+    def relative_paths(self, timeline_export):
+        return [str(path.relative_to(self.output_directory).as_posix()) for path in timeline_export.output_file_paths.values()]
+
+    def test_output_file_names(self):
+        timeline_export = TimelineExport(self.project_file, "Youtube", self.output_directory)
+        self.assertEqual(self.relative_paths(timeline_export), [
+            "Library/Event A/Edit.txt",
+            "Library/Event A/edit (2).txt",
+            "Library/Event A/EDIT (3).txt",
+            "Library/Event B/Edit.txt",
+            "Library/Event_ 1/Cut_ v2_final_.txt",
+            "Library/Event A/_.txt",
+            "Library/Event A/Empty.txt"
+        ])
+
+    def test_run(self):
+        timeline_export = TimelineExport(self.project_file, "Marker Name - Frames", self.output_directory, max_workers=2)
+        self.assertEqual(timeline_export.existing_files(), [])
+
+        summary = timeline_export.run()
+        self.assertEqual((summary.files, summary.markers, summary.skipped), (6, 12, 1))
+        for timeline, output_file_path in timeline_export.output_file_paths.items():
+            with self.subTest(output_file_path=output_file_path):
+                if timeline.markers:
+                    expected = OutputFormatting.format_marker_list(timeline.markers, "Marker Name - Frames")
+                    self.assertEqual(output_file_path.read_text(encoding='utf-8').splitlines(), expected)
+                else:
+                    self.assertFalse(output_file_path.exists())
+
+        # a second export of the same project reports the files it would overwrite
+        self.assertEqual(len(TimelineExport(self.project_file, "Youtube", self.output_directory).existing_files()), 6)
+
+if __name__ == '__main__':
+    unittest.main()
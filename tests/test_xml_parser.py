@@ -0,0 +1,32 @@
+import tempfile
+import unittest
+from pathlib import Path
+from fcpx_marker_tool.parsers.xmlparser import XMLParser
+import samplelibrary
+
+class CanParseTest(unittest.TestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = Path(temporary_directory.name)
+
+    def can_parse(self, text):
+        return XMLParser(samplelibrary.write_library(self.directory / 'file.xml', text)).can_parse()
+
+    def test_known_documents(self):
+        self.assertTrue(self.can_parse(samplelibrary.create_library(events=1)))
+        self.assertTrue(self.can_parse('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE xmeml>\n<xmeml version="5"><sequence/></xmeml>'))
+
+    def test_other_files(self):
+        self.assertFalse(self.can_parse('<?xml version="1.0" encoding="UTF-8"?>\n<plist version="1.0"><dict/></plist>'))
+        self.assertFalse(self.can_parse(''))
+        self.assertFalse(self.can_parse('not xml at all'))
+        self.assertFalse(XMLParser(self.directory / 'missing.fcpxml').can_parse())
+
+    def test_only_reads_the_start(self):
+        # the root element's start tag is enough, so a truncated document is still accepted
+        self.assertTrue(self.can_parse(samplelibrary.create_library(events=1)[:5000]))
+
+if __name__ == '__main__':
+    unittest.main()